@@ -0,0 +1,105 @@
+"""Regression checks for the inventory data layer, on a fake worksheet.
+
+Run from the project root:
+
+    python -m benchmarks.checks
+
+Like the benchmarks, the checks run the real application code against
+benchmarks.fake_sheets.FakeWorksheet, so no credentials are needed.
+Each check raises AssertionError when the behaviour regressed.
+"""
+import os
+import sys
+
+# The fake worksheet has no quota, so do not pace the requests
+os.environ.setdefault("INVENTORY_SHEETS_REQUESTS_PER_MINUTE", "100000000")
+# Start every check from the sheet, not a saved snapshot
+os.environ["INVENTORY_SNAPSHOT_PATH"] = ""
+
+from modules import config, google_sheets  # noqa: E402
+from modules.storage import HEADERS, ID_COLUMN  # noqa: E402
+from benchmarks.fake_sheets import install_fake_backend  # noqa: E402
+from benchmarks.run_benchmarks import make_rows  # noqa: E402
+
+
+def expire_cache():
+    """Expire the cached list while keeping the snapshot, like the TTL."""
+    google_sheets._cache.clear()
+
+
+def check_delta_sync_sees_rows_added_by_hand():
+    """A row typed below the others has no revision; delta must see it."""
+    config.SYNC_MODE = "delta"
+    google_sheets.invalidate_cache()
+    worksheet = install_fake_backend(config.SHARDS[0], make_rows(10))
+    google_sheets.get_data()
+
+    worksheet.rows.append(["hand written", "tools", "3", "pcs"])
+    expire_cache()
+    names = [item.name for item in google_sheets.get_data()]
+    assert "hand written" in names, "delta sync missed a row added by hand"
+    assert len(names) == 11, f"expected 11 items, got {len(names)}"
+
+
+def check_delta_sync_sees_app_changes():
+    """Rows changed through the app get a new revision and are fetched."""
+    config.SYNC_MODE = "delta"
+    google_sheets.invalidate_cache()
+    worksheet = install_fake_backend(config.SHARDS[0], make_rows(10))
+    item = google_sheets.get_data()[4]
+
+    worksheet.rows[5][2] = "99"
+    worksheet.rows[5][4] = "rchanged"
+    expire_cache()
+    quantities = {
+        entry.id: entry.quantity for entry in google_sheets.get_data()
+    }
+    assert quantities[item.id] == 99, "delta sync missed a changed row"
+
+
+def check_full_load_backfills_columns_in_ranges():
+    """A sheet without IDs gets both headers and one range of IDs."""
+    config.SYNC_MODE = "full"
+    google_sheets.invalidate_cache()
+    rows = [row[:4] for row in make_rows(10)]
+    worksheet = install_fake_backend(config.SHARDS[0], rows)
+    worksheet.rows[0] = worksheet.rows[0][:4]
+    sent = []
+    batch_update = worksheet.batch_update
+
+    def record(data, **kwargs):
+        sent.append([value_range["range"] for value_range in data])
+        batch_update(data, **kwargs)
+
+    worksheet.batch_update = record
+    google_sheets.get_data()
+
+    assert worksheet.rows[0] == HEADERS, f"headers are {worksheet.rows[0]}"
+    assert all(row[ID_COLUMN - 1] for row in worksheet.rows[1:]), (
+        "rows were left without an ID"
+    )
+    assert sent == [["E1", "F1:F11"]], f"sent ranges {sent}"
+
+
+CHECKS = [
+    check_delta_sync_sees_rows_added_by_hand,
+    check_delta_sync_sees_app_changes,
+    check_full_load_backfills_columns_in_ranges
+]
+
+
+def main():
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL {check.__name__}: {e}")
+        else:
+            print(f"ok   {check.__name__}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import re
+import time
+from collections import Counter
+from modules import storage
+from modules.storage import HEADERS, SheetsBackend
+
+
+def parse_cell(name):
+    """Return the (row, col) of an A1 cell name, e.g. "C5" -> (5, 3)."""
+    match = re.fullmatch(r"([A-Z]+)(\d+)", name)
+    if match is None:
+        raise ValueError(f"Invalid cell name '{name}'.")
+    col = 0
+    for letter in match.group(1):
+        col = col * 26 + ord(letter) - ord("A") + 1
+    return int(match.group(2)), col
+
+
+def parse_range(name):
+    """Return the corners of an A1 range, e.g. "A2:F3" -> (2, 1, 3, 6).
+
+    The last row is None when the range runs to the end, e.g. "E2:E".
+    """
+    first, _, last = name.partition(":")
+    first_row, first_col = parse_cell(first)
+    if last.isalpha():
+        last_row, last_col = None, parse_cell(f"{last}1")[1]
+    else:
+        last_row, last_col = parse_cell(last or first)
+    return first_row, first_col, last_row, last_col
+
+
+class FakeClient:
+    """Stand-in for the gspread Client of a FakeWorksheet.
+
+    Only the spreadsheets:batchUpdate requests deleting rows are
+    supported.
+
+    Args:
+        worksheet (FakeWorksheet): The worksheet the requests apply to.
+    """
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+
+    def batch_update(self, spreadsheet_id, body):
+        self.worksheet._request("spreadsheet_batch_update")
+        # Requests apply one after the other, like in the API
+        for request in body["requests"]:
+            delete = request["deleteDimension"]["range"]
+            if delete["sheetId"] != self.worksheet.id:
+                raise ValueError(f"Unknown sheet {delete['sheetId']}.")
+            del self.worksheet.rows[delete["startIndex"]:delete["endIndex"]]
+
+
+class FakeWorksheet:
+    """In-memory stand-in for a gspread Worksheet.
+
+    It implements the worksheet methods used by SheetsBackend, sleeps
+    for latency seconds per call to mimic a network round trip, and
+    counts the calls so benchmarks can report requests per operation.
+
+    Args:
+        rows (list): Item rows, without the header row.
+        latency (float): Seconds each call takes.
+        id (int): The worksheet ID.
+    """
+
+    def __init__(self, rows, latency=0.0, id=0):
+        self.rows = [list(HEADERS)] + rows
+        self.latency = latency
+        self.id = id
+        self.spreadsheet_id = "fake"
+        self.client = FakeClient(self)
+        self.calls = Counter()
+
+    def _request(self, method):
+        self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_all_values(self):
+        self._request("get_all_values")
+        # Like the API, rows are padded to the widest one
+        width = max(len(row) for row in self.rows)
+        return [row + [""] * (width - len(row)) for row in self.rows]
+
+    def col_values(self, col):
+        self._request("col_values")
+        values = [row[col - 1] if len(row) >= col else "" for row in self.rows]
+        # Trailing empty cells are not returned
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def batch_get(self, ranges):
+        self._request("batch_get")
+        value_ranges = []
+        for name in ranges:
+            first_row, first_col, last_row, last_col = parse_range(name)
+            rows = [
+                row[first_col - 1:last_col]
+                for row in self.rows[first_row - 1:last_row]
+            ]
+            # Like the API, trailing empty cells and rows are dropped
+            for row in rows:
+                while row and not row[-1]:
+                    row.pop()
+            while rows and not rows[-1]:
+                rows.pop()
+            value_ranges.append(rows)
+        return value_ranges
+
+    def append_row(self, values, **kwargs):
+        self._request("append_row")
+        self.rows.append([str(value) for value in values])
+
+    def append_rows(self, rows, **kwargs):
+        self._request("append_rows")
+        self.rows.extend([str(value) for value in row] for row in rows)
+
+    def delete_rows(self, start_index, end_index=None):
+        self._request("delete_rows")
+        del self.rows[start_index - 1:end_index or start_index]
+
+    def update_cell(self, row, col, value):
+        self._request("update_cell")
+        self._set_cell(row, col, value)
+
+    def batch_update(self, data, **kwargs):
+        self._request("batch_update")
+        for value_range in data:
+            first_row, first_col, _, _ = parse_range(value_range["range"])
+            for i, values in enumerate(value_range["values"]):
+                for j, value in enumerate(values):
+                    self._set_cell(first_row + i, first_col + j, value)
+
+    def _set_cell(self, row, col, value):
+        while len(self.rows) < row:
+            self.rows.append([])
+        cells = self.rows[row - 1]
+        cells.extend([""] * (col - len(cells)))
+        cells[col - 1] = str(value)
+
+
+def install_fake_backend(shard, rows, latency=0.0):
+    """Make a shard use a SheetsBackend on a fake worksheet.
+
+    The real SheetsBackend code runs, only the gspread worksheet it
+    talks to is replaced.
+
+    Args:
+        shard (str): The shard name, one of config.SHARDS.
+        rows (list): Item rows, without the header row.
+        latency (float): Seconds each worksheet call takes.
+
+    Returns:
+        FakeWorksheet: The worksheet, to inspect its rows and calls.
+    """
+    worksheet = FakeWorksheet(rows, latency)
+    backend = SheetsBackend(None, None, shard)
+    backend._worksheet_handle = worksheet
+    with storage._backends_lock:
+        storage._backends[shard] = backend
+    return worksheet
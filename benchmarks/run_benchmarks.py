@@ -0,0 +1,364 @@
+"""Benchmarks for the inventory data layer, on a fake worksheet.
+
+Run from the project root:
+
+    python -m benchmarks.run_benchmarks --sizes 1000,100000 --json out.json
+    python -m benchmarks.run_benchmarks --compare out.json
+
+Every benchmark runs the real application code; only the gspread
+worksheet is replaced by benchmarks.fake_sheets.FakeWorksheet, so no
+credentials or network access are needed. --latency adds a delay to
+every worksheet call to model the round trip to Google.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# The fake worksheet has no quota, so do not pace the requests
+os.environ.setdefault("INVENTORY_SHEETS_REQUESTS_PER_MINUTE", "100000000")
+# Keep the saved snapshot out of the project directory
+os.environ.setdefault(
+    "INVENTORY_SNAPSHOT_PATH",
+    os.path.join(tempfile.gettempdir(), "benchmark_inventory.snapshot")
+)
+
+from rich.console import Console  # noqa: E402
+from modules import config, google_sheets, inventory_management  # noqa: E402
+from modules.bulk_io import FIELD_TYPES  # noqa: E402
+from modules.helpers import convert_to_dict  # noqa: E402
+from modules.input_validation import validate_columns  # noqa: E402
+from modules.reports import build_report  # noqa: E402
+from modules.storage import HEADERS, new_item_id, new_revision  # noqa: E402
+from benchmarks.fake_sheets import install_fake_backend  # noqa: E402
+
+
+DEFAULT_SIZES = "1000,100000,1000000"
+
+ADJECTIVES = [
+    "steel", "brass", "heavy", "cordless", "electric", "mini", "large",
+    "plastic", "wooden", "rubber", "copper", "metric", "industrial"
+]
+NOUNS = [
+    "drill", "hammer", "bolt", "screw", "wrench", "saw", "pliers", "tape",
+    "glue", "nail", "washer", "clamp", "chisel", "sander", "ladder"
+]
+TYPES = [
+    "tools", "fasteners", "hardware", "paint", "electrical", "plumbing",
+    "garden", "safety", "adhesives", "lumber"
+]
+UNITS = ["pcs", "kg", "m", "l", "box"]
+
+SEARCH_QUERIES = ["drill", "steel bolt", "saw 12", "ha", "no such item"]
+FUZZY_QUERIES = ["drils", "hamer", "stel bolt", "fastener"]
+# Items deleted by each bulk_delete_handler call
+BULK_DELETE_SIZE = 100
+QUERY_QUERIES = [
+    "type:tools quantity<5",
+    "unit:kg quantity>=400",
+    "name~drill type:paint",
+    "type:fasteners"
+]
+
+
+def make_rows(count, seed=0):
+    """Generate item rows the way they are stored in the worksheet.
+
+    Args:
+        count (int): The number of rows.
+        seed (int): Seed for reproducible rows.
+
+    Returns:
+        list: Rows of name, type, quantity, unit, revision and ID.
+    """
+    rng = random.Random(seed)
+    return [
+        [
+            f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}",
+            rng.choice(TYPES),
+            str(rng.randint(0, 500)),
+            rng.choice(UNITS),
+            new_revision(),
+            new_item_id()
+        ]
+        for i in range(count)
+    ]
+
+
+def measure(function, repeat):
+    """Run function repeat times and return the median duration.
+
+    Args:
+        function (function): The code to time, called without arguments.
+        repeat (int): The number of runs.
+
+    Returns:
+        float: The median duration in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def load_inventory(rows, latency):
+    """Put rows in a fresh fake worksheet and load them into the cache.
+
+    Returns:
+        FakeWorksheet: The worksheet behind the default shard.
+    """
+    google_sheets.invalidate_cache()
+    worksheet = install_fake_backend(config.SHARDS[0], rows, latency)
+    google_sheets.get_data()
+    return worksheet
+
+
+def benchmark_size(size, latency, repeat, operations):
+    """Run every benchmark on an inventory of the given size.
+
+    Args:
+        size (int): The number of items.
+        latency (float): Seconds each worksheet call takes.
+        repeat (int): Runs per benchmark; the median is reported.
+        operations (int): Handler calls timed per run.
+
+    Returns:
+        list: One result dictionary per benchmark.
+    """
+    results = []
+
+    def record(name, seconds, ops=1, calls=None):
+        results.append({
+            "name": name,
+            "rows": size,
+            "seconds": seconds,
+            "per_op_ms": seconds / ops * 1000,
+            "calls_per_op": None if calls is None else calls / ops
+        })
+
+    rows = make_rows(size)
+    if os.path.exists(config.SNAPSHOT_PATH):
+        os.remove(config.SNAPSHOT_PATH)
+    sheet_data = [list(HEADERS)] + rows
+
+    record(
+        "convert_to_dict",
+        measure(lambda: convert_to_dict(sheet_data), repeat)
+    )
+    del sheet_data
+
+    columns = dict(zip(FIELD_TYPES, map(list, zip(*rows))))
+    record(
+        "validate_columns",
+        measure(lambda: validate_columns(columns, FIELD_TYPES), repeat)
+    )
+    del columns
+
+    def full_load():
+        google_sheets.invalidate_cache()
+        google_sheets.get_data()
+
+    worksheet = load_inventory([list(row) for row in rows], latency)
+    worksheet.calls.clear()
+    seconds = measure(full_load, repeat)
+    calls = sum(worksheet.calls.values()) / repeat
+    record("get_data (full load)", seconds, calls=calls)
+    record("get_data (cached)", measure(google_sheets.get_data, repeat))
+
+    def resume():
+        google_sheets.invalidate_cache()
+        start = time.perf_counter()
+        google_sheets.resume_snapshot()
+        google_sheets.get_data()
+        seconds = time.perf_counter() - start
+        # Let the background check finish before the next run
+        while google_sheets._snapshot.revalidating:
+            time.sleep(0.01)
+        return seconds
+
+    # The loads above save the snapshot file from a background thread
+    while not os.path.exists(config.SNAPSHOT_PATH):
+        time.sleep(0.01)
+    record(
+        "resume_snapshot (first data)",
+        statistics.median(resume() for _ in range(repeat))
+    )
+
+    for query in SEARCH_QUERIES:
+        record(
+            f"search_items {query!r}",
+            measure(lambda: google_sheets.search_items(query), repeat)
+        )
+    for query in FUZZY_QUERIES:
+        record(
+            f"fuzzy_search_items {query!r}",
+            measure(lambda: google_sheets.fuzzy_search_items(query), repeat)
+        )
+    for query in QUERY_QUERIES:
+        record(
+            f"query_items {query!r}",
+            measure(lambda: google_sheets.query_items(query), repeat)
+        )
+
+    # Render to memory instead of the terminal, and quit the pager
+    data = google_sheets.get_data()
+    inventory_management.CONSOLE = Console(file=io.StringIO(), width=120)
+    inventory_management.user_input = lambda *args, **kwargs: "q"
+    with contextlib.redirect_stdout(io.StringIO()):
+        record(
+            "display_items (first page)",
+            measure(
+                lambda: inventory_management.display_items(data, "Items"),
+                repeat
+            )
+        )
+    report = build_report(data)
+    record("build_report", measure(lambda: build_report(data), repeat))
+    record("report low stock", measure(lambda: report.below(5), repeat))
+    quantity_key = inventory_management.sort_key("quantity")
+    record(
+        "sort by quantity",
+        measure(lambda: sorted(data, key=quantity_key), repeat)
+    )
+
+    rng = random.Random(size)
+
+    def run_handlers(name, handler):
+        worksheet.calls.clear()
+        start = time.perf_counter()
+        for _ in range(operations):
+            handler()
+        seconds = time.perf_counter() - start
+        record(name, seconds, operations, sum(worksheet.calls.values()))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        worksheet = load_inventory([list(row) for row in rows], latency)
+        del rows
+        run_handlers(
+            "new_item_handler",
+            lambda: google_sheets.new_item_handler(
+                ("new item", "tools", "1", "pcs")
+            )
+        )
+
+        def update():
+            item = rng.choice(google_sheets.get_data())
+            changes = dict(item.to_dict(), quantity="7")
+            google_sheets.update_handler(item.id, changes, item)
+
+        run_handlers("update_handler", update)
+
+        def delete():
+            item = rng.choice(google_sheets.get_data())
+            google_sheets.delete_handler(item.id)
+
+        run_handlers("delete_handler", delete)
+
+        def bulk_delete():
+            data = google_sheets.get_data()
+            # Small inventories run out of items after a few batches
+            count = min(BULK_DELETE_SIZE, len(data))
+            google_sheets.bulk_delete_handler(
+                [item.id for item in rng.sample(data, count)]
+            )
+
+        run_handlers(f"bulk_delete_handler ({BULK_DELETE_SIZE})", bulk_delete)
+
+    return results
+
+
+def print_results(results, baseline=None):
+    """Print the results, with the change against a baseline if given.
+
+    Args:
+        results (list): Result dictionaries from benchmark_size.
+        baseline (dict, optional): A previous --json report.
+    """
+    previous = {}
+    if baseline:
+        previous = {
+            (result["name"], result["rows"]): result
+            for result in baseline["results"]
+        }
+
+    print(f"{'benchmark':36} {'rows':>9} {'ms/op':>12} {'calls/op':>9}"
+          + ("  change" if previous else ""))
+    for result in results:
+        calls = result["calls_per_op"]
+        line = (
+            f"{result['name']:36} {result['rows']:>9} "
+            f"{result['per_op_ms']:>12.3f} "
+            f"{'' if calls is None else format(calls, '.1f'):>9}"
+        )
+        old = previous.get((result["name"], result["rows"]))
+        if old and old["per_op_ms"]:
+            change = result["per_op_ms"] / old["per_op_ms"] - 1
+            line += f"  {change:+.0%}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"comma-separated inventory sizes (default {DEFAULT_SIZES})"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="seconds added to every worksheet call"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="runs per benchmark, the median is reported"
+    )
+    parser.add_argument(
+        "--operations",
+        type=int,
+        default=20,
+        help="handler calls timed per handler benchmark"
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="a previous --json report")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in [int(size) for size in args.sizes.split(",")]:
+        print(f"Benchmarking {size} rows...", file=sys.stderr)
+        results.extend(
+            benchmark_size(size, args.latency, args.repeat, args.operations)
+        )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+
+    if args.json:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency": args.latency,
+            "repeat": args.repeat,
+            "results": results
+        }
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from modules import config
+from modules.google_sheets import (
+    get_data,
+    search_items,
+    fuzzy_search_items,
+    new_item_handler,
+    new_items_handler,
+    delete_handler,
+    bulk_delete_handler,
+    update_handler,
+    bulk_update_handler
+)
+from modules.storage import get_backend
+
+
+# gspread and sqlite3 only offer blocking calls, so the coroutines below
+# run them on this shared pool. Every call goes through the single
+# backend instance, whose gspread client keeps one HTTP session, so
+# concurrent requests reuse its pooled connections.
+_executor = ThreadPoolExecutor(
+    max_workers=config.ASYNC_WORKERS,
+    thread_name_prefix="inventory-async"
+)
+
+
+async def _run(function, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, function, *args)
+
+
+async def get_data_async(shard=None):
+    """Asynchronous version of google_sheets.get_data.
+
+    Args:
+        shard (str, optional): Only return the items of this shard.
+
+    Returns:
+        list: The inventory items, or None if loading failed.
+    """
+    return await _run(get_data, shard)
+
+
+async def search_items_async(query, shard=None):
+    """Asynchronous version of google_sheets.search_items.
+
+    Args:
+        query (str): The text to search for.
+        shard (str, optional): Only search the items of this shard.
+
+    Returns:
+        list: The matching items.
+    """
+    return await _run(search_items, query, shard)
+
+
+async def fuzzy_search_items_async(query, limit=None, shard=None):
+    """Asynchronous version of google_sheets.fuzzy_search_items.
+
+    Args:
+        query (str): The words to search for.
+        limit (int, optional): The most results to return.
+        shard (str, optional): Only search the items of this shard.
+
+    Returns:
+        list: The closest items, best match first.
+    """
+    return await _run(fuzzy_search_items, query, limit, shard)
+
+
+async def new_item_handler_async(new_item, shard=None):
+    """Asynchronous version of google_sheets.new_item_handler.
+
+    Args:
+        new_item (tuple): A tuple containing the new item data.
+        shard (str, optional): The shard to add it to.
+
+    Returns:
+        bool: True if the item was saved, False otherwise.
+    """
+    return await _run(new_item_handler, new_item, shard)
+
+
+async def new_items_handler_async(new_items, shard=None):
+    """Asynchronous version of google_sheets.new_items_handler.
+
+    Args:
+        new_items (list): Tuples containing the new item data.
+        shard (str, optional): The shard to add them to.
+
+    Returns:
+        bool: True if the items were saved, False otherwise.
+    """
+    return await _run(new_items_handler, new_items, shard)
+
+
+async def update_handler_async(item_id, item, current_item=None):
+    """Asynchronous version of google_sheets.update_handler.
+
+    Args:
+        item_id (str): The ID of the item to update.
+        item (dict): A dictionary containing the updated item data.
+        current_item (dict, optional): The item as it was loaded.
+
+    Returns:
+        bool: True if the change was saved, False otherwise.
+    """
+    return await _run(update_handler, item_id, item, current_item)
+
+
+async def bulk_update_handler_async(updates):
+    """Asynchronous version of google_sheets.bulk_update_handler.
+
+    Args:
+        updates (list): (item_id, item, current_item) tuples.
+
+    Returns:
+        bool: True if the edits were saved, False otherwise.
+    """
+    return await _run(bulk_update_handler, updates)
+
+
+async def delete_handler_async(item_id):
+    """Asynchronous version of google_sheets.delete_handler.
+
+    Args:
+        item_id (str): The ID of the item to delete.
+
+    Returns:
+        bool: True if the item was deleted, False otherwise.
+    """
+    return await _run(delete_handler, item_id)
+
+
+async def bulk_delete_handler_async(item_ids):
+    """Asynchronous version of google_sheets.bulk_delete_handler.
+
+    Args:
+        item_ids (list): The IDs of the items to delete.
+
+    Returns:
+        bool: True if the items were deleted, False otherwise.
+    """
+    return await _run(bulk_delete_handler, item_ids)
+
+
+async def get_rows_async(ranges, shard=None):
+    """Read several row ranges concurrently, one request per range.
+
+    Args:
+        ranges (list): (first_row, last_row) pairs, both inclusive.
+        shard (str, optional): The shard to read, the first by default.
+
+    Returns:
+        list: For each range, its rows as lists of strings.
+
+    Raises:
+        StorageError: If any of the ranges cannot be read.
+    """
+    backend = get_backend(shard)
+    results = await asyncio.gather(*(
+        _run(backend.get_rows, [row_range]) for row_range in ranges
+    ))
+    return [rows[0] for rows in results]
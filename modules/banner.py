@@ -0,0 +1,33 @@
+# Welcome banner, pre-rendered with text2art("Inventory") from the art
+# package so startup does not load its font engine.
+# Regenerate it with: python -m modules.banner
+BANNER_LINES = [
+    ' ___                             _                       ',
+    '|_ _| _ __  __   __  ___  _ __  | |_   ___   _ __  _   _ ',
+    " | | | '_ \\ \\ \\ / / / _ \\| '_ \\ | __| / _ \\ | '__|| | | |",
+    ' | | | | | | \\ V / |  __/| | | || |_ | (_) || |   | |_| |',
+    '|___||_| |_|  \\_/   \\___||_| |_| \\__| \\___/ |_|    \\__, |',
+    '                                                   |___/ ',
+]
+
+BANNER = "\n".join(BANNER_LINES) + "\n"
+
+
+def render_banner(text="Inventory"):
+    """Render banner text with the art package.
+
+    Only needed to regenerate BANNER_LINES, so art is imported here.
+
+    Args:
+        text (str): The text to render.
+
+    Returns:
+        str: The ASCII art for the text.
+    """
+    from art import text2art
+    return text2art(text)
+
+
+if __name__ == "__main__":
+    for line in render_banner().split("\n")[:-1]:
+        print(f"    {line!r},")
@@ -0,0 +1,333 @@
+import csv
+import json
+import os
+from itertools import islice
+from rich.console import Console
+from modules import config
+from modules.google_sheets import FIELDS, new_items_handler
+from modules.input_validation import validate_columns
+from modules.storage import StorageError, get_backend
+
+
+# Validation rule for each field, the same ones used by the input prompts
+FIELD_TYPES = {
+    "name": "text",
+    "type": "text",
+    "quantity": "positive number",
+    "unit": "text"
+}
+
+# Only the first rejected rows are kept, so bad files use bounded memory
+MAX_REPORTED_ERRORS = 20
+
+FORMATS = (".csv", ".jsonl")
+
+
+def get_format(path):
+    """Return the file format from the file extension.
+
+    Args:
+        path (str): The file path.
+
+    Returns:
+        str: ".csv" or ".jsonl".
+
+    Raises:
+        ValueError: If the extension is not supported.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(
+            f"Unsupported file type '{extension}', use .csv or .jsonl."
+        )
+    return extension
+
+
+def read_records(file, file_format):
+    """Stream records from an open CSV or JSONL file.
+
+    Args:
+        file (file): The open file.
+        file_format (str): ".csv" or ".jsonl".
+
+    Yields:
+        tuple: (line number, record dict or None if the line is unreadable).
+    """
+    if file_format == ".csv":
+        reader = csv.DictReader(file)
+        # Accept headers in any case, e.g. "Name" from a sheet export
+        reader.fieldnames = [name.lower() for name in reader.fieldnames or []]
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                record = None
+            yield line_number, record
+
+
+def clean_value(value):
+    """Return a record value as a stripped string, "" if missing."""
+    return "" if value is None else str(value).strip()
+
+
+def validate_record(record):
+    """Check a record against the same rules as the input prompts.
+
+    Args:
+        record (dict): The record with name, type, quantity and unit.
+
+    Returns:
+        tuple: The item values and a list of error messages.
+    """
+    values = tuple(clean_value(record.get(field)) for field in FIELD_TYPES)
+    columns = {field: [value] for field, value in zip(FIELD_TYPES, values)}
+    errors = validate_columns(columns, FIELD_TYPES, workers=1)
+    return values, errors.get(0, [])
+
+
+def validate_records(records, workers=None):
+    """Check many records at once, column by column.
+
+    The rules are those of validate_record, applied with
+    input_validation.validate_columns; every record is checked, so all
+    the errors are reported.
+
+    Args:
+        records (list): Record dicts, or None for unreadable lines.
+        workers (int, optional): Worker processes, as for
+            validate_columns.
+
+    Returns:
+        tuple: The item values of the valid records, in order, and the
+        error messages of the others by position in records.
+    """
+    errors = {}
+    readable = []
+    positions = []
+    for position, record in enumerate(records):
+        if record is None:
+            errors[position] = ["unreadable line"]
+        else:
+            readable.append(record)
+            positions.append(position)
+
+    columns = {
+        field: [clean_value(record.get(field)) for record in readable]
+        for field in FIELD_TYPES
+    }
+    invalid = validate_columns(columns, FIELD_TYPES, workers=workers)
+    for position, messages in invalid.items():
+        errors[positions[position]] = messages
+
+    values = [
+        row
+        for position, row in enumerate(zip(*columns.values()))
+        if position not in invalid
+    ]
+    return values, dict(sorted(errors.items()))
+
+
+def import_file(path, batch_size=None):
+    """Import items from a CSV or JSONL file.
+
+    The file is read as a stream, batch_size rows at a time. Each batch
+    is validated column by column and its valid rows are saved in one
+    append request. Invalid rows are reported and skipped without
+    stopping the import.
+
+    Args:
+        path (str): The file to import.
+        batch_size (int, optional): Rows per request,
+            IMPORT_BATCH_SIZE by default.
+
+    Returns:
+        tuple: (imported rows, rejected rows, first error messages,
+        whether every batch was saved).
+    """
+    batch_size = batch_size or config.IMPORT_BATCH_SIZE
+    file_format = get_format(path)
+    imported = 0
+    rejected = 0
+    errors = []
+
+    with open(path, newline="", encoding="utf-8") as file:
+        records = read_records(file, file_format)
+        while True:
+            chunk = list(islice(records, batch_size))
+            if not chunk:
+                break
+            batch, row_errors = validate_records(
+                [record for _, record in chunk]
+            )
+
+            rejected += len(row_errors)
+            for position, messages in row_errors.items():
+                if len(errors) >= MAX_REPORTED_ERRORS:
+                    break
+                line_number = chunk[position][0]
+                errors.append(f"Line {line_number}: {', '.join(messages)}")
+
+            if batch:
+                if not new_items_handler(batch):
+                    return imported, rejected, errors, False
+                imported += len(batch)
+    return imported, rejected, errors, True
+
+
+def export_file(path, chunk_size=None):
+    """Export the inventory to a CSV or JSONL file.
+
+    Rows are streamed from the storage backend in chunks of chunk_size
+    and written as they arrive, without loading the whole inventory.
+    Sharded inventories are exported one shard after the other.
+
+    Args:
+        path (str): The file to write.
+        chunk_size (int, optional): Rows per read request,
+            EXPORT_CHUNK_SIZE by default.
+
+    Returns:
+        int: The number of exported items.
+
+    Raises:
+        StorageError: If the inventory cannot be read.
+    """
+    chunk_size = chunk_size or config.EXPORT_CHUNK_SIZE
+    file_format = get_format(path)
+    exported = 0
+
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        if file_format == ".csv":
+            writer = csv.writer(file)
+            writer.writerow(FIELDS)
+        for shard in config.SHARDS:
+            for row in get_backend(shard).iter_rows(chunk_size):
+                values = row[:len(FIELDS)]
+                if file_format == ".csv":
+                    writer.writerow(values)
+                else:
+                    record = dict(zip(FIELDS, values))
+                    file.write(json.dumps(record) + "\n")
+                exported += 1
+
+    return exported
+
+
+def audit_rows(shard=None, workers=None):
+    """Check the stored rows against the rules of the input prompts.
+
+    Rows edited in the sheet directly or written by other tools may
+    break them. Every column is validated at once with
+    input_validation.validate_columns.
+
+    Args:
+        shard (str, optional): Only check this shard, all by default.
+        workers (int, optional): Worker processes, as for
+            validate_columns.
+
+    Returns:
+        list: (shard, sheet row, error messages) for every invalid row.
+
+    Raises:
+        StorageError: If a shard cannot be read.
+    """
+    invalid_rows = []
+    for shard_name in [shard] if shard else config.SHARDS:
+        rows = get_backend(shard_name).get_all_values()[1:]
+        columns = {
+            field: list(map(str.strip, column))
+            for field, column in zip(FIELD_TYPES, zip(*rows))
+        }
+        if not columns:
+            continue
+        invalid = validate_columns(columns, FIELD_TYPES, workers=workers)
+        # Row 1 holds the headers
+        invalid_rows.extend(
+            (shard_name, position + 2, messages)
+            for position, messages in invalid.items()
+        )
+    return invalid_rows
+
+
+def import_items(path):
+    """Import items from a file and report the result to the user.
+
+    Args:
+        path (str): The file to import.
+
+    Returns:
+        bool: True if every valid row was saved, False otherwise.
+    """
+    console = Console()
+    try:
+        imported, rejected, errors, saved = import_file(path)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Failed to import items: {str(e)}\n")
+        return False
+
+    console.print(f"\n[green]Imported {imported} items.")
+    if rejected:
+        console.print(f"[yellow]{rejected} rows were rejected:")
+        for error in errors:
+            console.print(f"[yellow]  {error}")
+        if rejected > len(errors):
+            console.print(f"[yellow]  ... and {rejected - len(errors)} more")
+    print()
+    return saved
+
+
+def export_items(path):
+    """Export the inventory to a file and report the result to the user.
+
+    Args:
+        path (str): The file to write.
+
+    Returns:
+        bool: True if the inventory was exported, False otherwise.
+    """
+    console = Console()
+    try:
+        exported = export_file(path)
+    except (OSError, ValueError, StorageError) as e:
+        console.print(f"[bold red]Failed to export items: {str(e)}\n")
+        return False
+    console.print(f"\n[green]Exported {exported} items to {path}.\n")
+    return True
+
+
+def audit_items(shard=None, workers=None):
+    """Check the stored rows and report the invalid ones to the user.
+
+    Args:
+        shard (str, optional): Only check this shard, all by default.
+        workers (int, optional): Worker processes validating the rows.
+
+    Returns:
+        bool: True if every row is valid, False otherwise.
+    """
+    console = Console()
+    try:
+        invalid_rows = audit_rows(shard, workers)
+    except StorageError as e:
+        console.print(f"[bold red]Failed to audit items: {str(e)}\n")
+        return False
+
+    if not invalid_rows:
+        console.print("\n[green]Every row is valid.\n")
+        return True
+    console.print(f"\n[yellow]{len(invalid_rows)} rows are invalid:")
+    for shard_name, row, messages in invalid_rows[:MAX_REPORTED_ERRORS]:
+        message = ", ".join(messages)
+        console.print(f"[yellow]  {shard_name} row {row}: {message}")
+    if len(invalid_rows) > MAX_REPORTED_ERRORS:
+        more = len(invalid_rows) - MAX_REPORTED_ERRORS
+        console.print(f"[yellow]  ... and {more} more")
+    print()
+    return False
@@ -0,0 +1,514 @@
+import argparse
+import csv
+import json
+import sys
+from rich.console import Console
+from rich.table import Table
+from modules import config, instrumentation
+from modules.bulk_io import (
+    validate_record,
+    import_items,
+    export_items,
+    audit_items
+)
+from modules.google_sheets import (
+    FIELDS,
+    get_data,
+    search_items,
+    fuzzy_search_items,
+    query_items,
+    new_item_handler,
+    new_items_handler,
+    delete_handler,
+    bulk_delete_handler,
+    update_handler,
+    bulk_update_handler,
+    flush_writes
+)
+from modules.helpers import parse_indices
+from modules.inventory_management import render_table
+from modules.query import QueryError
+from modules.startup_time import measure_import_times
+
+
+def print_items(items, output_format, table_title):
+    """Print items in the requested output format, without paging.
+
+    Args:
+        items (list): The items to print.
+        output_format (str): "table", "csv" or "jsonl".
+        table_title (str): The title used for the table format.
+
+    Returns:
+        None
+    """
+    if output_format == "table":
+        if items:
+            render_table(items, table_title)
+        else:
+            Console().print("[bold red]No items found.[/bold red]")
+    elif output_format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["index"] + FIELDS)
+        for item in items:
+            writer.writerow([item[key] for key in ["index"] + FIELDS])
+    else:
+        for item in items:
+            record = {key: item[key] for key in ["index"] + FIELDS}
+            sys.stdout.write(json.dumps(record) + "\n")
+
+
+def load_item(data, index):
+    """Return the item at a 1-based index, or None if it does not exist.
+
+    Args:
+        data (list): The inventory items.
+        index (int): The index given on the command line.
+
+    Returns:
+        Item or None: The item, or None after printing an error.
+    """
+    if index not in range(1, len(data) + 1):
+        Console().print(
+            f"[red]Invalid index '{index}'. "
+            f"Index should be between 1 and {len(data)}."
+        )
+        return None
+    return data[index - 1]
+
+
+def merge_update(current_item, changes):
+    """Apply field changes to an item and validate the result.
+
+    Args:
+        current_item (Item): The item as it was loaded.
+        changes (dict): New values for some of the fields.
+
+    Returns:
+        tuple: The updated item as a dict and a list of error messages.
+    """
+    record = {field: current_item[field] for field in FIELDS}
+    record.update(
+        (field, value)
+        for field, value in changes.items()
+        if field in FIELDS and value is not None
+    )
+    values, errors = validate_record(record)
+    updated_item = dict(zip(FIELDS, values), index=current_item["index"])
+    return updated_item, errors
+
+
+def command_list(args):
+    """Print the whole inventory, or one location of it."""
+    data = get_data(args.location)
+    if data is None:
+        return 1
+    print_items(data, args.format, "Inventory Items")
+    return 0
+
+
+def command_search(args):
+    """Print the items whose name contains the query.
+
+    With --fuzzy, print the closest matches of name and type instead,
+    best match first.
+    """
+    data = get_data()
+    if data is None:
+        return 1
+    if args.fuzzy:
+        results = fuzzy_search_items(args.query, args.limit, args.location)
+        title = f'Closest matches for "{args.query}"'
+    else:
+        results = search_items(args.query, args.location)
+        title = f'Search results for "{args.query}"'
+    print_items(results, args.format, title)
+    return 0
+
+
+def command_query(args):
+    """Print the items matching a field query, e.g. `type:tools`."""
+    try:
+        results = query_items(args.query, args.location)
+    except QueryError as e:
+        Console().print(f"[red]{str(e)}")
+        return 1
+    print_items(results, args.format, f'Query results for "{args.query}"')
+    return 0
+
+
+def command_add(args):
+    """Validate and save a new item."""
+    record = {field: getattr(args, field) for field in FIELDS}
+    values, errors = validate_record(record)
+    if errors:
+        Console().print(f"[red]Invalid item: {', '.join(errors)}")
+        return 1
+    return 0 if new_item_handler(values, args.location) else 1
+
+
+def command_update(args):
+    """Validate and save changes to an existing item."""
+    data = get_data()
+    if data is None:
+        return 1
+    current_item = load_item(data, args.index)
+    if current_item is None:
+        return 1
+    changes = {field: getattr(args, field) for field in FIELDS}
+    updated_item, errors = merge_update(current_item, changes)
+    if errors:
+        Console().print(f"[red]Invalid item: {', '.join(errors)}")
+        return 1
+    saved = update_handler(current_item.id, updated_item, current_item)
+    return 0 if saved else 1
+
+
+def command_delete(args):
+    """Delete the items at the given indices, or matching --query.
+
+    Every row is deleted in one batched request per worksheet.
+    """
+    data = get_data()
+    if data is None:
+        return 1
+    try:
+        if args.query:
+            items = query_items(args.query)
+        else:
+            items = [
+                data[index - 1]
+                for index in parse_indices(args.indices, len(data))
+            ]
+    except (QueryError, ValueError) as e:
+        Console().print(f"[red]{str(e)}")
+        return 1
+    if not items:
+        Console().print("[yellow]No items to delete.")
+        return 0
+    if len(items) == 1:
+        return 0 if delete_handler(items[0].id) else 1
+    return 0 if bulk_delete_handler([item.id for item in items]) else 1
+
+
+def command_import(args):
+    """Import items from a CSV or JSONL file."""
+    return 0 if import_items(args.path) else 1
+
+
+def command_export(args):
+    """Export the inventory to a CSV or JSONL file."""
+    return 0 if export_items(args.path) else 1
+
+
+def command_audit(args):
+    """Report the stored rows that break the input rules."""
+    return 0 if audit_items(args.location, args.workers) else 1
+
+
+def command_report(args):
+    """Print stock totals by type and unit and the low stock items."""
+    data = get_data(args.location)
+    if data is None:
+        return 1
+
+    from modules.reports import build_report, print_report
+
+    report = build_report(data)
+    threshold = args.threshold
+    if threshold is None:
+        threshold = config.LOW_STOCK_THRESHOLD
+    if args.json:
+        sys.stdout.write(
+            json.dumps(report.to_dict(threshold), indent=2) + "\n"
+        )
+        return 0
+    print_report(report, threshold)
+    low_stock = report.below(threshold)
+    if low_stock:
+        print_items(low_stock, "table", "Low stock items")
+    return 0
+
+
+def command_startup_time(args):
+    """Report the import cost of a cold start, per module."""
+    timings = measure_import_times()
+    if args.json:
+        total = next(
+            (t["cumulative_ms"] for t in timings if t["module"] == "run"),
+            0
+        )
+        sys.stdout.write(json.dumps({
+            "total_ms": total,
+            "modules": timings
+        }, indent=2) + "\n")
+        return 0
+
+    table = Table(title="Startup import time")
+    table.add_column("Module", style="yellow")
+    table.add_column("Self (ms)", justify="right", style="yellow")
+    table.add_column("Cumulative (ms)", justify="right", style="yellow")
+    for timing in timings[:args.top]:
+        table.add_row(
+            timing["module"],
+            f"{timing['self_ms']:.1f}",
+            f"{timing['cumulative_ms']:.1f}"
+        )
+    Console().print(table)
+    return 0
+
+
+def command_batch(args):
+    """Run many operations read as JSON lines from stdin.
+
+    Each line is an object with an "op" of "add", "update" or "delete".
+    Indices refer to the inventory as it was before the batch; they are
+    resolved to item IDs up front, so deletes do not shift them. All
+    updates are sent in one request, all deletes in one request and all
+    adds are appended in one request at the end.
+    """
+    console = Console()
+    data = get_data()
+    if data is None:
+        return 1
+
+    adds = []
+    updates = {}
+    deletes = set()
+    failed = False
+
+    for line_number, line in enumerate(sys.stdin, start=1):
+        if not line.strip():
+            continue
+        try:
+            operation = json.loads(line)
+            op = operation["op"]
+        except (ValueError, TypeError, KeyError):
+            console.print(f"[red]Line {line_number}: invalid operation")
+            failed = True
+            continue
+
+        errors = []
+        if op == "add":
+            values, errors = validate_record(operation)
+            if not errors:
+                adds.append(values)
+        elif op in ("update", "delete"):
+            index = operation.get("index")
+            if not isinstance(index, int) or load_item(data, index) is None:
+                errors = ["invalid index"]
+            elif op == "delete":
+                deletes.add(index)
+            else:
+                # Later updates of the same item build on earlier ones
+                current_item = data[index - 1]
+                base = updates.get(index, (current_item, None))[1]
+                updated_item, errors = merge_update(
+                    base or current_item,
+                    operation
+                )
+                if not errors:
+                    updates[index] = (current_item, updated_item)
+        else:
+            errors = [f"unknown op '{op}'"]
+
+        if errors:
+            console.print(f"[red]Line {line_number}: {', '.join(errors)}")
+            failed = True
+
+    pending_updates = [
+        (current_item.id, updated_item, current_item)
+        for index, (current_item, updated_item) in sorted(updates.items())
+        if index not in deletes
+    ]
+    pending_deletes = [data[index - 1].id for index in sorted(deletes)]
+
+    if pending_updates and not bulk_update_handler(pending_updates):
+        failed = True
+
+    if pending_deletes and not bulk_delete_handler(pending_deletes):
+        failed = True
+
+    if adds and not new_items_handler(adds):
+        failed = True
+
+    return 1 if failed else 0
+
+
+def build_parser():
+    """Build the argument parser for the scripting interface.
+
+    Returns:
+        argparse.ArgumentParser: The parser with one subcommand per
+        operation.
+    """
+    parser = argparse.ArgumentParser(
+        prog="run.py",
+        description="Inventory Management System. "
+                    "Run without arguments for the interactive menus."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="list all items")
+    list_parser.set_defaults(handler=command_list)
+
+    search_parser = subparsers.add_parser("search", help="search by name")
+    search_parser.add_argument("query")
+    search_parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="rank names and types by similarity, tolerating typos"
+    )
+    search_parser.add_argument(
+        "--limit",
+        type=int,
+        help="most fuzzy results to print"
+    )
+    search_parser.set_defaults(handler=command_search)
+
+    query_parser = subparsers.add_parser(
+        "query",
+        help="find items by field, e.g. 'type:tools quantity<5'"
+    )
+    query_parser.add_argument("query")
+    query_parser.set_defaults(handler=command_query)
+
+    for command_parser in (list_parser, search_parser, query_parser):
+        command_parser.add_argument(
+            "--format",
+            choices=["table", "csv", "jsonl"],
+            default="table"
+        )
+
+    add_parser = subparsers.add_parser("add", help="add an item")
+    for field in FIELDS:
+        add_parser.add_argument(field)
+
+    for command_parser in (
+        list_parser,
+        search_parser,
+        query_parser,
+        add_parser
+    ):
+        command_parser.add_argument(
+            "--location",
+            choices=config.SHARDS,
+            help="only use this worksheet of a sharded inventory"
+        )
+    add_parser.set_defaults(handler=command_add)
+
+    update_parser = subparsers.add_parser("update", help="update an item")
+    update_parser.add_argument("index", type=int)
+    for field in FIELDS:
+        update_parser.add_argument(f"--{field}")
+    update_parser.set_defaults(handler=command_update)
+
+    delete_parser = subparsers.add_parser("delete", help="delete items")
+    delete_selection = delete_parser.add_mutually_exclusive_group(
+        required=True
+    )
+    delete_selection.add_argument(
+        "indices",
+        nargs="?",
+        help="an index, or indices and ranges such as '3,5-9'"
+    )
+    delete_selection.add_argument(
+        "--query",
+        help="delete the items matching a query, e.g. 'type:paint'"
+    )
+    delete_parser.set_defaults(handler=command_delete)
+
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="run JSON-lines operations read from stdin"
+    )
+    batch_parser.set_defaults(handler=command_batch)
+
+    import_parser = subparsers.add_parser(
+        "import",
+        help="import items from a .csv or .jsonl file"
+    )
+    import_parser.add_argument("path")
+    import_parser.set_defaults(handler=command_import)
+
+    export_parser = subparsers.add_parser(
+        "export",
+        help="export items to a .csv or .jsonl file"
+    )
+    export_parser.add_argument("path")
+    export_parser.set_defaults(handler=command_export)
+
+    audit_parser = subparsers.add_parser(
+        "audit",
+        help="check every stored row against the input rules"
+    )
+    audit_parser.add_argument(
+        "--location",
+        choices=config.SHARDS,
+        help="only check this worksheet of a sharded inventory"
+    )
+    audit_parser.add_argument(
+        "--workers",
+        type=int,
+        help="processes validating the rows "
+             f"(default {config.VALIDATION_WORKERS})"
+    )
+    audit_parser.set_defaults(handler=command_audit)
+
+    report_parser = subparsers.add_parser(
+        "report",
+        help="show stock totals by type and unit and low stock items"
+    )
+    report_parser.add_argument(
+        "--threshold",
+        type=float,
+        help="low stock threshold "
+             f"(default {config.LOW_STOCK_THRESHOLD:g})"
+    )
+    report_parser.add_argument(
+        "--location",
+        choices=config.SHARDS,
+        help="only report on this worksheet of a sharded inventory"
+    )
+    report_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print the report as JSON"
+    )
+    report_parser.set_defaults(handler=command_report)
+
+    startup_parser = subparsers.add_parser(
+        "startup-time",
+        help="measure the import time of a cold start per module"
+    )
+    startup_parser.add_argument(
+        "--top",
+        type=int,
+        default=25,
+        help="number of slowest modules to show"
+    )
+    startup_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print every module as JSON, e.g. to compare releases"
+    )
+    startup_parser.set_defaults(handler=command_startup_time)
+
+    return parser
+
+
+def run(argv):
+    """Run a single scripting command and return its exit status.
+
+    Args:
+        argv (list): The command line arguments, without the program name.
+
+    Returns:
+        int: 0 on success, 1 if the operation failed.
+    """
+    args = build_parser().parse_args(argv)
+    with instrumentation.span(f"command.{args.command}"):
+        status = args.handler(args)
+    # Journaled changes are saved before the process exits
+    flush_writes()
+    return status
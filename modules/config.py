@@ -0,0 +1,86 @@
+import os
+
+
+# Storage backend used by the application: "sheets" or "sqlite"
+BACKEND = os.environ.get("INVENTORY_BACKEND", "sheets").lower()
+
+# Google Sheets settings
+CREDS_FILE = os.environ.get("INVENTORY_CREDS_FILE", "creds.json")
+SPREADSHEET_NAME = os.environ.get("INVENTORY_SPREADSHEET", "Inventory")
+WORKSHEET_NAME = os.environ.get("INVENTORY_WORKSHEET", "inventory_sheet")
+
+# Worksheets the inventory is sharded across, e.g. one per warehouse,
+# separated by commas. An entry can point to another spreadsheet as
+# "spreadsheet/worksheet". New items go to the first one by default.
+SHARDS = [
+    shard.strip()
+    for shard in os.environ.get("INVENTORY_WORKSHEETS", WORKSHEET_NAME)
+    .split(",")
+    if shard.strip()
+]
+
+# Google Sheets API quota: requests are paced to stay within it, and
+# rejected requests are retried with backoff up to SHEETS_MAX_RETRIES times
+SHEETS_REQUESTS_PER_MINUTE = int(
+    os.environ.get("INVENTORY_SHEETS_REQUESTS_PER_MINUTE", "60")
+)
+SHEETS_MAX_RETRIES = int(os.environ.get("INVENTORY_SHEETS_MAX_RETRIES", "5"))
+
+# SQLite settings
+DB_PATH = os.environ.get("INVENTORY_DB_PATH", "inventory.db")
+
+# Load the inventory in the background while a menu waits for input
+PREFETCH = os.environ.get("INVENTORY_PREFETCH", "1") not in ("", "0")
+
+# File keeping the last loaded inventory, shown at the next start while
+# the sheet is checked in the background; empty to disable
+SNAPSHOT_PATH = os.environ.get("INVENTORY_SNAPSHOT_PATH", "inventory.snapshot")
+
+# Seconds a loaded inventory is served from memory before it is re-fetched
+CACHE_TTL = float(os.environ.get("INVENTORY_CACHE_TTL", "60"))
+
+# Rows shown per page by the inventory viewer
+PAGE_SIZE = int(os.environ.get("INVENTORY_PAGE_SIZE", "20"))
+
+# Items at or below this quantity are reported as low stock
+LOW_STOCK_THRESHOLD = float(
+    os.environ.get("INVENTORY_LOW_STOCK_THRESHOLD", "5")
+)
+
+# Most results shown by a fuzzy search, best match first
+FUZZY_RESULTS = int(os.environ.get("INVENTORY_FUZZY_RESULTS", "20"))
+
+# How an expired cache is refreshed: "full" reloads the whole sheet,
+# "delta" fetches only rows whose revision changed. Only the app writes
+# revisions, so delta does not see cells edited by hand in the sheet;
+# rows added by hand have no revision and make it reload everything.
+SYNC_MODE = os.environ.get("INVENTORY_SYNC", "full").lower()
+
+# How changes are saved: "sync" waits for the storage backend, "journal"
+# logs them to a local journal file and sends them in the background
+WRITE_MODE = os.environ.get("INVENTORY_WRITES", "sync").lower()
+JOURNAL_PATH = os.environ.get("INVENTORY_JOURNAL_PATH", "inventory.journal")
+
+# Seconds between two batches of journaled changes sent to the backend
+JOURNAL_FLUSH_INTERVAL = float(
+    os.environ.get("INVENTORY_JOURNAL_FLUSH_INTERVAL", "2")
+)
+
+# Rows written per append request by bulk imports
+# and read per request by exports
+IMPORT_BATCH_SIZE = int(os.environ.get("INVENTORY_IMPORT_BATCH_SIZE", "5000"))
+EXPORT_CHUNK_SIZE = int(os.environ.get("INVENTORY_EXPORT_CHUNK_SIZE", "5000"))
+
+# Worker processes and rows per chunk for validating many rows at once,
+# e.g. by the audit command; 1 validates in the main process
+VALIDATION_WORKERS = int(os.environ.get("INVENTORY_VALIDATION_WORKERS", "1"))
+VALIDATION_CHUNK_SIZE = int(
+    os.environ.get("INVENTORY_VALIDATION_CHUNK_SIZE", "100000")
+)
+
+# Worker threads used by the asyncio client for blocking backend calls
+ASYNC_WORKERS = int(os.environ.get("INVENTORY_ASYNC_WORKERS", "8"))
+
+# Record timings of backend calls and operations, reported at exit.
+# Also enabled by running run.py with --profile.
+PROFILE = os.environ.get("INVENTORY_PROFILE", "") not in ("", "0")
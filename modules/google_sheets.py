@@ -1,101 +1,1131 @@
-import gspread
-from gspread.exceptions import (
-    APIError,
-    SpreadsheetNotFound,
-    WorksheetNotFound
-)
-from google.oauth2.service_account import Credentials
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from cachetools import TTLCache
 from rich.console import Console
-from modules.helpers import convert_to_dict
+from modules import config, instrumentation, journal, snapshot_file
+from modules.helpers import (
+    Item,
+    convert_to_dict,
+    items_from_columns
+)
+from modules.query import parse_query
+from modules.search_index import (
+    FuzzyIndex,
+    HashIndex,
+    SortedIndex,
+    TrigramIndex
+)
+from modules.storage import (
+    FIELDS,
+    HEADERS,
+    ID_COLUMN,
+    REVISION_COLUMN,
+    StorageError,
+    get_backend,
+    new_item_id,
+    new_revision
+)
+
+
+class ShardSnapshot:
+    """The items of one shard, in row order, and their revision tokens."""
+
+    def __init__(self, items, revisions):
+        self.items = items
+        self.revisions = revisions
+
+
+class Snapshot:
+    """The last loaded inventory and the revision token of each row.
+
+    data is the merged view of every shard, in config.SHARDS order, and
+    shards holds the per-shard rows it was built from. ids maps every
+    item ID to its item, whose shard and row say where it is stored.
+    Writes patch the snapshot in place so it stays in sync with the sheet.
+    The lock is held while the snapshot is loaded or patched, so handlers
+    can run from several threads. Deletes shift rows, so they also wait
+    until no update resolved to a row number is still being written.
+
+    version changes whenever data is replaced by a load, and generation
+    whenever a write patches it. saved holds the columns last written
+    to (or read from) the snapshot file, and revalidating is set while
+    a snapshot read from that file is checked against the sheet.
+    """
+
+    def __init__(self):
+        self.data = None
+        self.shards = {}
+        self.ids = {}
+        self.lock = threading.RLock()
+        self.updates_in_flight = 0
+        self.updates_done = threading.Condition(self.lock)
+        self.indexed = False
+        self.version = 0
+        self.generation = 0
+        self.saved = None
+        self.revalidating = False
+        self.revalidated = threading.Condition(self.lock)
+
 
+_snapshot = Snapshot()
 
-# Connect to Google Sheets API
-SCOPE = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive.file",
-    "https://www.googleapis.com/auth/drive"
-]
+# Marks the snapshot as fresh for CACHE_TTL seconds
+CACHE_KEY = "inventory"
+_cache = TTLCache(maxsize=1, ttl=config.CACHE_TTL)
 
-CREDS = Credentials.from_service_account_file('creds.json')
-SCOPED_CREDS = CREDS.with_scopes(SCOPE)
-GSPREAD_CLIENT = gspread.authorize(SCOPED_CREDS)
-SHEET = GSPREAD_CLIENT.open('Inventory')
+# Indexes over the cached inventory, built by the first search after a
+# load and then updated in place by the write handlers
+name_index = TrigramIndex()
+fuzzy_index = FuzzyIndex()
+# Used by query_items, by field
+QUERY_INDEXES = {
+    "name": name_index,
+    "type": HashIndex("type"),
+    "unit": HashIndex("unit"),
+    "quantity": SortedIndex("quantity")
+}
+INDEXES = [fuzzy_index] + list(QUERY_INDEXES.values())
 
 
-def get_data():
-    """Retrieve data from the Google Sheets inventory worksheet.
+def invalidate_cache():
+    """Drop the cached inventory so the next get_data call re-fetches it.
 
     Returns:
-        list: A list of dictionaries representing inventory items.
+        None
+    """
+    with _snapshot.lock:
+        _cache.clear()
+        _snapshot.data = None
+        _snapshot.shards = {}
+        _snapshot.ids = {}
+        _snapshot.indexed = False
+
+
+def warmup():
+    """Connect to the storage backend before the first operation needs it.
+
+    Call this when network latency can be paid up front, for example
+    right before a batch of operations. Startup never connects on its
+    own; the menus load the inventory in the background (see prefetch).
+
+    Returns:
+        bool: True if the backend is ready, False otherwise.
     """
     console = Console()
     try:
-        inventory_sheet = SHEET.worksheet('inventory_sheet')
-        inventory_data = inventory_sheet.get_all_values()
-        data = convert_to_dict(inventory_data)
-        return data
-    except (APIError, SpreadsheetNotFound, WorksheetNotFound) as e:
-        console.print(f"[bold red]Failed to retrieve Inventory data: {str(e)}")
+        for shard in config.SHARDS:
+            get_backend(shard).connect()
+        return True
+    except StorageError as e:
+        console.print(f"[bold red]Failed to connect to storage: {str(e)}")
+        return False
+
 
+@instrumentation.timed("get_data")
+def get_data(shard=None):
+    """Retrieve data from the configured inventory storage backend.
 
-def new_item_handler(new_item):
-    """Add a new item to the Google Sheets inventory worksheet.
+    The result is served from the in-memory cache while it is fresh.
+    Once it expires, INVENTORY_SYNC=delta refreshes only the rows whose
+    revision changed, while the default "full" mode reloads everything.
+    Every shard is fetched in parallel and merged into one list.
 
     Args:
-        new_item (tuple): A tuple containing the new item data.
+        shard (str, optional): Only return the items of this shard.
+
+    Returns:
+        list: A list of dictionaries representing inventory items.
+    """
+    # Concurrent callers wait for a single fetch instead of repeating it
+    with _snapshot.lock:
+        try:
+            data = _get_fresh_data()
+        except StorageError as e:
+            console = Console()
+            console.print(
+                f"[bold red]Failed to retrieve Inventory data: {str(e)}"
+            )
+            return None
+
+        if shard is None:
+            return data
+        return [item for item in data if item.shard == shard]
+
+
+def _get_fresh_data():
+    # The body of get_data, lock held; raises StorageError
+    data = _cache.get(CACHE_KEY)
+    instrumentation.count("cache.misses" if data is None else "cache.hits")
+    if data is None and _snapshot.data is not None and (
+        _snapshot.revalidating or _has_pending_writes()
+    ):
+        # Keep the local view until journaled changes are saved, or
+        # while the saved snapshot is checked in the background
+        data = _snapshot.data
+    elif data is None:
+        if config.SYNC_MODE == "delta" and _snapshot.data is not None:
+            data = sync_snapshot()
+        else:
+            data = load_snapshot()
+        _cache[CACHE_KEY] = data
+    return data
+
+
+_prefetch_lock = threading.Lock()
+_prefetch_thread = None
+
+
+def prefetch():
+    """Load and index the inventory in the background, if it is stale.
+
+    Call this before waiting for user input, e.g. when a menu is shown.
+    The next get_data or search either finds the data ready or waits
+    for the load already in progress, instead of starting its own.
+    Errors are left for that next call to report.
 
     Returns:
         None
     """
+    global _prefetch_thread
+    if not config.PREFETCH:
+        return
+    with _prefetch_lock:
+        if _prefetch_thread is not None and _prefetch_thread.is_alive():
+            return
+        _prefetch_thread = threading.Thread(target=_prefetch, daemon=True)
+        _prefetch_thread.start()
+
+
+@instrumentation.timed("prefetch")
+def _prefetch():
+    # Background part of prefetch; the lock makes a caller arriving
+    # meanwhile wait for this load and then reuse it
+    try:
+        with _snapshot.lock:
+            _get_fresh_data()
+            _ensure_indexes()
+    except Exception:
+        # Whatever failed is raised again by the next get_data, which
+        # reports it; the background thread only has to survive
+        pass
+
+
+def _map_shards(function):
+    # Run a blocking call for every shard at once, so the total latency
+    # is close to the slowest shard rather than the sum of all of them
+    if len(config.SHARDS) == 1:
+        return [function(config.SHARDS[0])]
+    with ThreadPoolExecutor(max_workers=len(config.SHARDS)) as executor:
+        return list(executor.map(function, config.SHARDS))
+
+
+def _fetch_shard(shard):
+    # Network part of a full load, safe to run in a worker thread
+    inventory_data = get_backend(shard).get_all_values()
+    if inventory_data:
+        _backfill_columns(shard, inventory_data)
+    revisions = [row[REVISION_COLUMN - 1] for row in inventory_data[1:]]
+    return convert_to_dict(inventory_data, shard), revisions
+
+
+def _backfill_columns(shard, inventory_data):
+    # Rows added outside the app have no ID yet, and no revision either,
+    # which only delta sync needs. The missing values are generated,
+    # written back in one request and filled into inventory_data.
+    # Both headers are written in any mode, so the sheet is laid out
+    # the same way whichever mode loaded it first.
+    columns = [(REVISION_COLUMN, None), (ID_COLUMN, new_item_id)]
+    if config.SYNC_MODE == "delta":
+        columns[0] = (REVISION_COLUMN, new_revision)
+
+    cells = []
+    for row_number, row in enumerate(inventory_data, start=1):
+        row.extend([""] * (len(HEADERS) - len(row)))
+        for col, new_value in columns:
+            if row_number == 1:
+                value = HEADERS[col - 1]
+            elif new_value is None:
+                continue
+            else:
+                value = row[col - 1] or new_value()
+            if row[col - 1] != value:
+                row[col - 1] = value
+                cells.append((row_number, col, value))
+    if cells:
+        get_backend(shard).update_cells(cells)
+
+
+@instrumentation.timed("load_snapshot")
+def load_snapshot():
+    """Download the whole inventory and rebuild the snapshot.
+
+    Changes still waiting in the journal are applied on top, and the
+    downloaded rows are saved to the snapshot file for the next start.
+
+    Returns:
+        list: The loaded inventory items.
+    """
+    pending, fetched = _fetch_all()
+    columns = _get_columns(fetched)
+    data = _install(pending, fetched)
+    _save_snapshot_file(columns, background=True)
+    return data
+
+
+def _fetch_all():
+    # Network part of a full load: the journal entries not sent yet and
+    # the (items, revisions) of every shard
+    if journal.is_enabled():
+        # Backfilling writes rows by number, which a flush could shift
+        with journal.get_journal().flush_lock:
+            pending = journal.get_journal().pending()
+            fetched = _map_shards(_fetch_shard)
+    else:
+        pending = []
+        fetched = _map_shards(_fetch_shard)
+    return pending, fetched
+
+
+def _install(pending, fetched):
+    # Replace the snapshot with loaded shards. The search indexes are
+    # built by the next search, so showing the items never waits for them
+    _snapshot.shards = {
+        shard: ShardSnapshot(items, revisions)
+        for shard, (items, revisions) in zip(config.SHARDS, fetched)
+    }
+    data = []
+    _merge_shards(data)
+
+    _snapshot.ids = {item.id: item for item in data}
+    _snapshot.data = data
+    _snapshot.indexed = False
+    _snapshot.version += 1
+    _apply_entries(pending)
+    return data
+
+
+def _get_columns(fetched):
+    # The rows of every shard as snapshot_file columns
+    return {
+        shard: [
+            [item.name for item in items],
+            [item.type for item in items],
+            [item.quantity for item in items],
+            [item.unit for item in items],
+            [item.id for item in items],
+            list(revisions)
+        ]
+        for shard, (items, revisions) in zip(config.SHARDS, fetched)
+    }
+
+
+_save_lock = threading.Lock()
+
+
+def _save_snapshot_file(columns, background=False):
+    # Keep the rows as the sheet has them, without journaled changes,
+    # which are replayed on top at the next start
+    if not config.SNAPSHOT_PATH:
+        return
+    _snapshot.saved = columns
+    if background:
+        # Loads do not wait for the disk; a save cut short by exiting
+        # leaves the previous file, which is revalidated anyway
+        threading.Thread(
+            target=_save_snapshot_file,
+            args=(columns,),
+            daemon=True
+        ).start()
+        return
+    try:
+        with _save_lock:
+            snapshot_file.save(config.SNAPSHOT_PATH, columns)
+    except OSError:
+        pass  # Only the next start is slower
+
+
+def resume_snapshot(on_change=None):
+    """Show the inventory saved by the last session right away.
+
+    The saved snapshot is served by get_data while a background thread
+    downloads the sheet. If the sheet changed, the snapshot is replaced
+    and on_change is called from that thread; until then, write handlers
+    wait for the check to finish, so rows are never written by a stale
+    row number.
+
+    Args:
+        on_change (function, optional): Called without arguments when
+            the sheet differed from the saved snapshot.
+
+    Returns:
+        bool: True if a saved snapshot was loaded, False if there is
+        none and the first get_data call downloads the inventory.
+    """
+    if not config.SNAPSHOT_PATH:
+        return False
+    shards = snapshot_file.load(config.SNAPSHOT_PATH)
+    if shards is None:
+        return False
+
+    fetched = [
+        # Revisions are patched by writes, the saved columns are not
+        (items_from_columns(shards[shard], shard), list(shards[shard][5]))
+        for shard in config.SHARDS
+    ]
+    with _snapshot.lock:
+        if _snapshot.data is not None:
+            return False  # Already loaded from the sheet
+        pending = journal.get_journal().pending() if (
+            journal.is_enabled()
+        ) else []
+        _install(pending, fetched)
+        _snapshot.saved = shards
+        _snapshot.revalidating = True
+
+    threading.Thread(
+        target=_revalidate,
+        args=(on_change,),
+        daemon=True
+    ).start()
+    return True
+
+
+@instrumentation.timed("revalidate")
+def _revalidate(on_change):
+    # Background part of resume_snapshot
+    with _snapshot.lock:
+        generation = _snapshot.generation
+    try:
+        pending, fetched = _fetch_all()
+        columns = _get_columns(fetched)
+    except StorageError as e:
+        Console().print(
+            f"[bold red]Failed to refresh the saved inventory: {str(e)}"
+        )
+        columns = None
+
+    changed = False
+    with _snapshot.lock:
+        _snapshot.revalidating = False
+        _snapshot.revalidated.notify_all()
+        if columns is None or _snapshot.data is None:
+            return
+        if _snapshot.generation != generation:
+            # Changed locally meanwhile; the next get_data loads again
+            return
+        changed = columns != _snapshot.saved
+        if changed:
+            _install(pending, fetched)
+        _cache[CACHE_KEY] = _snapshot.data
+
+    if changed:
+        _save_snapshot_file(columns)
+        if on_change is not None:
+            on_change()
+
+
+def get_version():
+    """Return a number that changes whenever the inventory is reloaded.
+
+    Lists returned by get_data before the number changed are outdated.
+
+    Returns:
+        int: The snapshot version.
+    """
+    return _snapshot.version
+
+
+def _update_indexes(method, items):
+    # Indexes are only kept current once a search has built them
+    if not _snapshot.indexed:
+        return
+    for search_index in INDEXES:
+        for item in items:
+            getattr(search_index, method)(item)
+
+
+def _ensure_indexes():
+    # Build the search indexes of a newly loaded snapshot, lock held
+    if not _snapshot.indexed:
+        for search_index in INDEXES:
+            search_index.build(_snapshot.data)
+        _snapshot.indexed = True
+
+
+def _merge_shards(data):
+    # Rebuild the merged view in place and renumber its indices
+    data[:] = [
+        item
+        for shard in config.SHARDS
+        for item in _snapshot.shards[shard].items
+    ]
+    for i, item in enumerate(data, start=1):
+        item.index = i
+
+
+def _fetch_shard_changes(shard):
+    # Network part of a delta sync, safe to run in a worker thread.
+    # Returns the new revisions and, for every changed block, the old
+    # item positions and the rows that replace them; or None when the
+    # shard has to be reloaded in full.
+    backend = get_backend(shard)
+    revisions = backend.get_revisions()
+    if "" in revisions:
+        # Rows without a revision, e.g. added by hand, cannot be tracked
+        return None
+
+    matcher = SequenceMatcher(
+        None, _snapshot.shards[shard].revisions, revisions, autojunk=False
+    )
+    changes = [
+        opcode for opcode in matcher.get_opcodes() if opcode[0] != "equal"
+    ]
+    ranges = [
+        (j1 + 2, j2 + 1)  # Row numbers, skipping the header row
+        for tag, i1, i2, j1, j2 in changes
+        if j2 > j1
+    ]
+    fetched = iter(backend.get_rows(ranges) if ranges else [])
+
+    blocks = []
+    for tag, i1, i2, j1, j2 in changes:
+        rows = next(fetched) if j2 > j1 else []
+        if len(rows) != j2 - j1:
+            # The sheet changed while syncing
+            return None
+        if any(not row[ID_COLUMN - 1] for row in rows):
+            # Only a full load gives new rows their IDs
+            return None
+        blocks.append((i1, i2, rows))
+    return revisions, blocks
+
+
+@instrumentation.timed("sync_snapshot")
+def sync_snapshot():
+    """Bring the snapshot up to date by fetching only changed rows.
+
+    The revision column of every shard is compared with the snapshot;
+    rows that were inserted or changed are downloaded in one request
+    per shard, deleted rows are dropped, and the cached list is
+    reconciled in place.
+
+    Returns:
+        list: The reconciled inventory items.
+    """
+    if set(_snapshot.shards) != set(config.SHARDS):
+        return load_snapshot()
+
+    results = _map_shards(_fetch_shard_changes)
+    if None in results:
+        return load_snapshot()
+
+    data = _snapshot.data
+    removed = []
+    added = []
+    for shard, (revisions, blocks) in zip(config.SHARDS, results):
+        if not blocks:
+            continue  # Nothing changed in this shard
+        shard_snapshot = _snapshot.shards[shard]
+        items = []
+        position = 0
+        for i1, i2, rows in blocks:
+            items.extend(shard_snapshot.items[position:i1])
+            removed.extend(shard_snapshot.items[i1:i2])
+            for row in rows:
+                item = Item(
+                    0,
+                    row[0],
+                    row[1],
+                    row[2],
+                    row[3],
+                    shard,
+                    id=row[ID_COLUMN - 1]
+                )
+                added.append(item)
+                items.append(item)
+            position = i2
+        items.extend(shard_snapshot.items[position:])
+        for row, item in enumerate(items, start=1):
+            item.row = row
+        shard_snapshot.items = items
+        shard_snapshot.revisions = revisions
+
+    if removed or added:
+        _merge_shards(data)
+        for item in removed:
+            # Changed rows are removed and added again under the same ID
+            if _snapshot.ids.get(item.id) is item:
+                del _snapshot.ids[item.id]
+        for item in added:
+            _snapshot.ids[item.id] = item
+        _update_indexes("remove", removed)
+        _update_indexes("add", added)
+        _save_snapshot_file(_get_columns([
+            (_snapshot.shards[shard].items, _snapshot.shards[shard].revisions)
+            for shard in config.SHARDS
+        ]), background=True)
+    return data
+
+
+@instrumentation.timed("search_items")
+def search_items(query, shard=None):
+    """Find the items whose name contains the query, ignoring case.
+
+    Args:
+        query (str): The text to search for.
+        shard (str, optional): Only search the items of this shard.
+
+    Returns:
+        list: The matching items, or an empty list if loading failed.
+    """
+    data = get_data()
+    if data is None:
+        return []
+    with _snapshot.lock:
+        _ensure_indexes()
+        results = name_index.search(query)
+    if shard is None:
+        return results
+    return [item for item in results if item.shard == shard]
+
+
+@instrumentation.timed("fuzzy_search_items")
+def fuzzy_search_items(query, limit=None, shard=None):
+    """Rank the items by how closely their name or type match the query.
+
+    Unlike search_items, words do not need to match exactly, so typos
+    and plurals still find the item.
+
+    Args:
+        query (str): The words to search for.
+        limit (int, optional): The most results to return, by default
+            config.FUZZY_RESULTS.
+        shard (str, optional): Only search the items of this shard.
+
+    Returns:
+        list: The closest items, best match first, or an empty list if
+        loading failed.
+    """
+    data = get_data()
+    if data is None:
+        return []
+    where = None if shard is None else (lambda item: item.shard == shard)
+    with _snapshot.lock:
+        _ensure_indexes()
+        results = fuzzy_index.search(
+            query,
+            limit or config.FUZZY_RESULTS,
+            where
+        )
+    return [item for _, item in results]
+
+
+@instrumentation.timed("query_items")
+def query_items(text, shard=None):
+    """Find the items matching a query such as `type:tools quantity<5`.
+
+    See query.parse_query for the syntax. Each condition uses an index
+    of its field and the most selective one is applied first.
+
+    Args:
+        text (str): The query.
+        shard (str, optional): Only search the items of this shard.
+
+    Returns:
+        list: The matching items ordered by index, or an empty list if
+        loading failed.
+
+    Raises:
+        QueryError: If the query is not valid.
+    """
+    query = parse_query(text)
+    data = get_data()
+    if data is None:
+        return []
+    with _snapshot.lock:
+        _ensure_indexes()
+        results = query.run(QUERY_INDEXES)
+    if shard is None:
+        return results
+    return [item for item in results if item.shard == shard]
+
+
+def _locate(item_id):
+    # Find the cached item with this ID, which knows its shard and row
+    with _snapshot.lock:
+        # Rows of a saved snapshot are only trusted once revalidated
+        while _snapshot.revalidating:
+            _snapshot.revalidated.wait()
+        if get_data() is None:
+            raise StorageError("Inventory data is not available.")
+        item = _snapshot.ids.get(item_id)
+        if item is None:
+            raise StorageError(f"Item {item_id} no longer exists.")
+        return item
+
+
+def _apply_entries(entries):
+    # Apply saved or journaled changes (see journal.Journal) to the
+    # cached inventory. Changes to items that are already in that state
+    # are skipped, so replaying journal entries is harmless.
+    data = _snapshot.data
+    if data is None:
+        return
+    _snapshot.generation += 1
+    merge = False
+    # Consecutive deletes are removed together, by item ID
+    deleted = {}
+    for entry in entries:
+        if deleted and entry["op"] != "delete":
+            _remove_items(list(deleted.values()))
+            deleted = {}
+        item = _snapshot.ids.get(entry["id"])
+        shard_snapshot = _snapshot.shards.get(entry["shard"])
+        if shard_snapshot is None:
+            continue
+        if entry["op"] == "add":
+            if item is not None:
+                continue
+            items = shard_snapshot.items
+            item = Item(
+                0,
+                *entry["values"],
+                shard=entry["shard"],
+                row=len(items) + 1,
+                id=entry["id"]
+            )
+            items.append(item)
+            shard_snapshot.revisions.append(entry["revision"])
+            _snapshot.ids[item.id] = item
+            if entry["shard"] == config.SHARDS[-1] and not merge:
+                # The last shard ends the merged view, just append
+                item.index = len(data) + 1
+                data.append(item)
+            else:
+                merge = True
+            _update_indexes("add", [item])
+        elif item is None:
+            continue
+        elif entry["op"] == "update":
+            for field, value in entry["fields"].items():
+                item[field] = value
+            shard_snapshot.revisions[item.row - 1] = entry["revision"]
+            _update_indexes("update", [item])
+        else:
+            if merge:
+                # Indices have to be right before removing by index
+                _merge_shards(data)
+                merge = False
+            deleted[item.id] = item
+    if deleted:
+        _remove_items(list(deleted.values()))
+    if merge:
+        _merge_shards(data)
+
+
+def _remove_items(items):
+    # Remove items from the cached inventory and shift the rows and
+    # indices after them, in one pass however many items are removed
+    rows_by_shard = {}
+    for item in items:
+        rows_by_shard.setdefault(item.shard, []).append(item.row - 1)
+    for shard, positions in rows_by_shard.items():
+        shard_snapshot = _snapshot.shards[shard]
+        positions.sort()
+        _delete_positions(shard_snapshot.items, positions)
+        _delete_positions(shard_snapshot.revisions, positions)
+        for row, item in enumerate(
+            shard_snapshot.items[positions[0]:],
+            start=positions[0] + 1
+        ):
+            item.row = row
+    data = _snapshot.data
+    positions = sorted(item.index - 1 for item in items)
+    _delete_positions(data, positions)
+    for index, item in enumerate(data[positions[0]:], start=positions[0] + 1):
+        item.index = index
+    for item in items:
+        del _snapshot.ids[item.id]
+    _update_indexes("remove", items)
+
+
+def _delete_positions(values, positions):
+    # Delete sorted positions from a list by copying the slices between
+    # them, rather than shifting the tail once per position
+    kept = []
+    for position, following in zip(positions, positions[1:] + [len(values)]):
+        kept.extend(values[position + 1:following])
+    values[positions[0]:] = kept
+
+
+def _log_entries(entries, error_message):
+    # Save changes to the journal and show them right away; the journal
+    # thread sends them to the storage backend
+    console = Console()
+    try:
+        with _snapshot.lock:
+            journal.get_journal().append(entries)
+            _apply_entries(entries)
+    except OSError as e:
+        console.print(f"[bold red]{error_message}: {str(e)}[/bold red]\n")
+        return False
+    return True
+
+
+def _has_pending_writes():
+    return journal.is_enabled() and journal.get_journal().has_pending()
+
+
+def flush_writes():
+    """Send the journaled changes to the storage backend now.
+
+    Call this before exiting, so changes made just before do not wait
+    for the next start. Does nothing unless INVENTORY_WRITES=journal.
+
+    Returns:
+        bool: True if every change is saved to the backend.
+    """
+    if not journal.is_enabled():
+        return True
     console = Console()
     try:
-        inventory_sheet = SHEET.worksheet('inventory_sheet')
-        inventory_sheet.append_row(new_item)
-        console.print("[green]Item saved successfully!\n")
-    except (APIError, SpreadsheetNotFound, WorksheetNotFound) as e:
-        console.print(f"[bold red]Failed to save item: {str(e)}\n")
+        return journal.get_journal().flush()
+    except (StorageError, OSError) as e:
+        console.print(
+            "[yellow]Some changes could not be sent and will be sent on "
+            f"the next start: {str(e)}"
+        )
+        return False
 
 
-def delete_handler(index):
-    """Delete an item from the Google Sheets inventory worksheet.
+@instrumentation.timed("new_item_handler")
+def new_item_handler(new_item, shard=None):
+    """Add a new item to the inventory storage backend.
 
     Args:
-        index (int): The index of the item to delete.
+        new_item (tuple): A tuple containing the new item data.
+        shard (str, optional): The shard to add it to,
+            the first configured one by default.
 
     Returns:
-        None
+        bool: True if the change was saved, False otherwise.
+    """
+    return _append_items([new_item], shard, "Item saved successfully!\n")
+
+
+@instrumentation.timed("new_items_handler")
+def new_items_handler(new_items, shard=None):
+    """Add many new items to the inventory storage backend in one request.
+
+    Args:
+        new_items (list): Tuples containing the new item data.
+        shard (str, optional): The shard to add them to,
+            the first configured one by default.
+
+    Returns:
+        bool: True if the items were saved, False otherwise.
     """
+    if len(new_items) == 1:
+        message = "Item saved successfully!"
+    else:
+        message = f"{len(new_items)} items saved successfully!"
+    return _append_items(new_items, shard, message)
+
+
+def _append_items(new_items, shard, message):
     console = Console()
+    shard = shard or config.SHARDS[0]
+    label = "item" if len(new_items) == 1 else "items"
+    entries = [
+        {
+            "op": "add",
+            "shard": shard,
+            "id": new_item_id(),
+            "values": list(new_item),
+            "revision": new_revision()
+        }
+        for new_item in new_items
+    ]
+
+    if journal.is_enabled():
+        if not _log_entries(entries, f"Failed to save {label}"):
+            return False
+        console.print(f"[green]{message}")
+        return True
+
+    rows = [
+        tuple(entry["values"]) + (entry["revision"], entry["id"])
+        for entry in entries
+    ]
     try:
-        inventory_sheet = SHEET.worksheet('inventory_sheet')
-        inventory_sheet.delete_rows(index + 1)
-        console.print("[green]Item deleted successfully![/green]\n")
-    except (APIError, SpreadsheetNotFound, WorksheetNotFound) as e:
-        console.print(f"[bold red]Error deleting item: {str(e)}[/bold red]\n")
+        backend = get_backend(shard)
+        if len(rows) == 1:
+            backend.append_row(rows[0])
+        else:
+            backend.append_rows(rows)
+        console.print(f"[green]{message}")
+    except StorageError as e:
+        invalidate_cache()
+        console.print(f"[bold red]Failed to save {label}: {str(e)}\n")
+        return False
+
+    with _snapshot.lock:
+        # Append the new items to the cached inventory
+        _apply_entries(entries)
+    return True
+
+
+@instrumentation.timed("delete_handler")
+def delete_handler(item_id):
+    """Delete an item from the inventory storage backend.
+
+    Args:
+        item_id (str): The ID of the item to delete.
+
+    Returns:
+        bool: True if the change was saved, False otherwise.
+    """
+    return _delete_items(
+        [item_id],
+        "Item deleted successfully!",
+        "Error deleting item"
+    )
+
+
+@instrumentation.timed("bulk_delete_handler")
+def bulk_delete_handler(item_ids):
+    """Delete many items in a single batched request per shard.
+
+    The backend of each shard finds the items by ID, checking the rows
+    the cache has for them first, and deletes them in one request:
+    contiguous rows as one range, from the bottom up, so the rows still
+    to be deleted keep their numbers. Items deleted meanwhile by another
+    client are skipped.
+    The cached inventory is then updated once, however many items were
+    deleted.
+
+    Args:
+        item_ids (list): The IDs of the items to delete.
+
+    Returns:
+        bool: True if the items were deleted, False otherwise.
+    """
+    item_ids = list(dict.fromkeys(item_ids))
+    if len(item_ids) == 1:
+        message = "Item deleted successfully!"
+    else:
+        message = f"{len(item_ids)} items deleted successfully!"
+    return _delete_items(item_ids, message, "Error deleting items")
+
+
+def _delete_items(item_ids, message, error_message):
+    console = Console()
+    # Deleting shifts the rows below, so other writes wait for it
+    with _snapshot.lock:
+        while _snapshot.updates_in_flight:
+            _snapshot.updates_done.wait()
+        try:
+            items = [_locate(item_id) for item_id in item_ids]
+            entries = [
+                {"op": "delete", "shard": item.shard, "id": item.id}
+                for item in items
+            ]
+            if journal.is_enabled():
+                if not _log_entries(entries, error_message):
+                    return False
+                console.print(f"[green]{message}[/green]\n")
+                return True
+            deleted = []
+            for shard, shard_entries in _group_by_shard(entries).items():
+                found = get_backend(shard).delete_items(
+                    [entry["id"] for entry in shard_entries],
+                    _row_hints(shard_entries)
+                )
+                deleted.extend(
+                    entry for entry in shard_entries if entry["id"] in found
+                )
+            _apply_entries(deleted)
+            if len(deleted) < len(entries):
+                invalidate_cache()
+        except StorageError as e:
+            invalidate_cache()
+            console.print(
+                f"[bold red]{error_message}: {str(e)}[/bold red]\n"
+            )
+            return False
+    if len(deleted) < len(entries):
+        _report_missing(len(entries) - len(deleted))
+        return False
+    console.print(f"[green]{message}[/green]\n")
+    return True
+
+
+def _group_by_shard(entries):
+    entries_by_shard = {}
+    for entry in entries:
+        entries_by_shard.setdefault(entry["shard"], []).append(entry)
+    return entries_by_shard
+
 
+def _row_hints(entries):
+    # The sheet rows the cache has for the entries' items. Rows move when
+    # other clients add or delete rows, so the backend checks them by ID
+    # before writing (see StorageBackend.find_rows).
+    hints = {}
+    for entry in entries:
+        item = _snapshot.ids.get(entry["id"])
+        if item is not None:
+            hints[item.id] = item.row + 1
+    return hints
 
-def update_handler(index_to_update, item):
-    """Update an existing item in the Google Sheets inventory worksheet.
+
+def _report_missing(count):
+    # Tell the user how many items a write left out
+    console = Console()
+    if count == 1:
+        message = "An item no longer exists in the sheet and was skipped."
+    else:
+        message = (
+            f"{count} items no longer exist in the sheet and were skipped."
+        )
+    console.print(f"[yellow]{message}[/yellow]\n")
+
+
+def get_changed_cells(row, item, current_item=None):
+    """Compare an updated item with its loaded version.
 
     Args:
-        index_to_update (int): The index of the item to update.
+        row (int): The worksheet row of the item.
         item (dict): A dictionary containing the updated item data.
+        current_item (dict, optional): The item as it was loaded.
+            When omitted, every field is treated as changed.
 
     Returns:
-        None
+        list: (row, col, value) tuples for the cells that changed.
+    """
+    cells = []
+    for col, field in enumerate(FIELDS, start=1):
+        if current_item is None or item[field] != current_item[field]:
+            cells.append((row, col, item[field]))
+    return cells
+
+
+@instrumentation.timed("update_handler")
+def update_handler(item_id, item, current_item=None):
+    """Update an existing item in the inventory storage backend.
+
+    Only the fields that differ from current_item are written,
+    all of them in a single batched request. The item is found by ID
+    first, so one moved by another client is still written in place,
+    and one deleted meanwhile is skipped.
+
+    Args:
+        item_id (str): The ID of the item to update.
+        item (dict): A dictionary containing the updated item data.
+        current_item (dict, optional): The item as it was loaded.
+
+    Returns:
+        bool: True if the change was saved, False otherwise.
     """
+    return _update_items(
+        [(item_id, item, current_item)],
+        "Item updated successfully!",
+        "Error updating item"
+    )
+
+
+@instrumentation.timed("bulk_update_handler")
+def bulk_update_handler(updates):
+    """Apply several item edits in a single batched request.
+
+    Edits spread over several shards take one request per shard.
+
+    Args:
+        updates (list): (item_id, item, current_item) tuples, where
+            current_item may be None to write every field.
+
+    Returns:
+        bool: True if the edits were saved, False otherwise.
+    """
+    if len(updates) == 1:
+        message = "Item updated successfully!"
+    else:
+        message = f"{len(updates)} items updated successfully!"
+    return _update_items(updates, message, "Error updating items")
+
+
+def _update_items(updates, message, error_message):
     console = Console()
+    entries = []
+    try:
+        with _snapshot.lock:
+            for item_id, item, current_item in updates:
+                cached_item = _locate(item_id)
+                cells = get_changed_cells(
+                    cached_item.row + 1,
+                    item,
+                    current_item
+                )
+                if not cells:
+                    continue
+                # Every updated row gets a new revision in the same request
+                entries.append({
+                    "op": "update",
+                    "shard": cached_item.shard,
+                    "id": item_id,
+                    "fields": {
+                        FIELDS[col - 1]: value for _, col, value in cells
+                    },
+                    "revision": new_revision()
+                })
+            if not entries:
+                console.print("[yellow]No changes to save.[/yellow]\n")
+                return True
+            if journal.is_enabled():
+                if not _log_entries(entries, error_message):
+                    return False
+                console.print(f"[green]{message}[/green]\n")
+                return True
+            # Deletes wait until these rows are written
+            _snapshot.updates_in_flight += 1
+    except StorageError as e:
+        console.print(f"[bold red]{error_message}: {str(e)}[/bold red]\n")
+        return False
+
     try:
-        inventory_sheet = SHEET.worksheet('inventory_sheet')
-        # Update item name
-        inventory_sheet.update_cell(index_to_update + 1, 1, item["name"])
-        # Update item type
-        inventory_sheet.update_cell(index_to_update + 1, 2, item["type"])
-        # Update item quantity
-        inventory_sheet.update_cell(index_to_update + 1, 3, item["quantity"])
-        # Update item unit
-        inventory_sheet.update_cell(index_to_update + 1, 4, item["unit"])
-
-        console.print("[green]Item updated successfully![/green]\n")
-    except (APIError, SpreadsheetNotFound, WorksheetNotFound) as e:
-        console.print(f"[bold red]Error updating item: {str(e)}[/bold red]\n")
+        updated = []
+        for shard, shard_entries in _group_by_shard(entries).items():
+            with _snapshot.lock:
+                hints = _row_hints(shard_entries)
+            cells = []
+            for entry in shard_entries:
+                cells.extend(
+                    (entry["id"], FIELDS.index(field) + 1, value)
+                    for field, value in entry["fields"].items()
+                )
+                cells.append(
+                    (entry["id"], REVISION_COLUMN, entry["revision"])
+                )
+            found = get_backend(shard).update_items(cells, hints)
+            updated.extend(
+                entry for entry in shard_entries if entry["id"] in found
+            )
+        with _snapshot.lock:
+            # Patched before a delete can shift the rows of the revisions
+            _apply_entries(updated)
+            if len(updated) < len(entries):
+                invalidate_cache()
+        if len(updated) < len(entries):
+            _report_missing(len(entries) - len(updated))
+            return False
+        console.print(f"[green]{message}[/green]\n")
+        return True
+    except StorageError as e:
+        invalidate_cache()
+        console.print(f"[bold red]{error_message}: {str(e)}[/bold red]\n")
+        return False
+    finally:
+        with _snapshot.lock:
+            _snapshot.updates_in_flight -= 1
+            _snapshot.updates_done.notify_all()
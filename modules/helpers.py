@@ -1,34 +1,219 @@
+import gc
+import re
+import sys
+import threading
+from contextlib import contextmanager
 from rich.console import Console
+from modules import instrumentation
 from modules.input_validation import user_input
 
 
-def convert_to_dict(data):
-    """Convert data from Google Sheets API into a list of dictionaries.
+def parse_quantity(value):
+    """Convert a quantity cell to a number.
+
+    Args:
+        value (str): The quantity as stored in the sheet.
+
+    Returns:
+        float or str: The numeric quantity, or the original value
+        if it is not a number.
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def format_quantity(quantity):
+    """Format a parsed quantity the way it is shown to the user.
+
+    Args:
+        quantity (float or str): A value returned by parse_quantity.
+
+    Returns:
+        str: "5" for whole numbers, "2.5" otherwise.
+    """
+    if isinstance(quantity, float):
+        if quantity.is_integer() and abs(quantity) < 1e15:
+            return str(int(quantity))
+        return repr(quantity)
+    return str(quantity)
+
+
+class Item:
+    """A single inventory item.
+
+    Items use __slots__ instead of a per-row dictionary, keep the
+    quantity as a number and share interned type and unit strings,
+    which keeps large inventories small in memory.
+    They still support dictionary-style access (item["name"]), where
+    the quantity is returned formatted as text.
+
+    The index is the position in the merged inventory shown to the user,
+    while shard and row locate the item in its worksheet. Both change
+    when items above it are deleted; the id never changes.
+    """
+
+    __slots__ = (
+        "index",
+        "name",
+        "type",
+        "quantity",
+        "unit",
+        "shard",
+        "row",
+        "id"
+    )
+
+    # The fields of the original item dictionaries
+    KEYS = ("index", "name", "type", "quantity", "unit")
+
+    def __init__(
+        self,
+        index,
+        name,
+        type,
+        quantity,
+        unit,
+        shard=None,
+        row=None,
+        id=None
+    ):
+        self.index = index
+        self.name = name
+        self.type = sys.intern(type)
+        self.quantity = parse_quantity(quantity)
+        self.unit = sys.intern(unit)
+        self.shard = shard
+        self.row = index if row is None else row
+        self.id = id
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        if key == "quantity":
+            return format_quantity(self.quantity)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        if key == "quantity":
+            value = parse_quantity(value)
+        elif key in ("type", "unit"):
+            value = sys.intern(value)
+        setattr(self, key, value)
+
+    def __repr__(self):
+        return f"Item({self.to_dict()!r})"
+
+    def get(self, key, default=None):
+        """Return the value for key, or default if the field is unknown."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        """Return the field names, in the same order as the old dicts."""
+        return self.KEYS
+
+    def to_dict(self):
+        """Return the item as a plain dictionary."""
+        return {key: self[key] for key in self.KEYS}
+
+
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+@contextmanager
+def _gc_paused():
+    # Building many items only allocates new objects, so there is
+    # nothing for the collector to find. Shards are converted in
+    # parallel: the first caller switches the collector off and the
+    # last one restores it, unless it was already off before.
+    global _gc_pauses, _gc_was_enabled
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+@instrumentation.timed("convert_to_dict")
+def convert_to_dict(data, shard=None):
+    """Convert data from Google Sheets API into a list of items.
 
     Args:
         data (list): A list of lists where the first sublist contains headers
-                     and subsequent sublists contain inventory data.
+                     and subsequent sublists contain inventory data
+                     in name, type, quantity, unit, revision, id
+                     column order.
+        shard (str, optional): The worksheet the rows were read from.
+
+    Returns:
+        list: A list of Item records representing the inventory data.
+    """
+    result = []
+    # Types and units repeat a lot, so every distinct value is stored once
+    strings = {}
+    intern = strings.setdefault
+    new_item = object.__new__
+    with _gc_paused():
+        # Skip the headers in the first row.
+        # Start from 1 to match Google Sheets row numbers
+        for i, row in enumerate(data[1:], start=1):
+            item = new_item(Item)
+            item.index = i
+            item.name = row[0]
+            item.type = intern(row[1], row[1])
+            item.quantity = parse_quantity(row[2])
+            item.unit = intern(row[3], row[3])
+            item.shard = shard
+            item.row = i
+            item.id = row[5] if len(row) > 5 else None
+            result.append(item)
+
+    return result
+
+
+def items_from_columns(columns, shard=None):
+    """Rebuild items from the columns of a snapshot file.
+
+    Unlike convert_to_dict, quantities are already parsed.
+
+    Args:
+        columns (list): The names, types, quantities, units and IDs lists,
+                        and optionally more columns, which are ignored.
+        shard (str, optional): The worksheet the items belong to.
 
     Returns:
-        list: A list of dictionaries representing the inventory data.
+        list: The items, in row order.
     """
-    # Extract the headers from the first row
-    headers = data[0]
-    # Initialize an empty list to store the dictionaries
+    names, types, quantities, units, ids = columns[:5]
     result = []
-    # Iterate over each row in the data starting from the second row
-    # Start from 1 to match Google Sheets row numbers
-    for i, row in enumerate(data[1:], start=1):
-        # Create a dictionary for the current row
-        row_dict = {
-            "index": i,  # Use the loop index as the row number.
-            headers[0].lower(): row[0],  # "name"
-            headers[1].lower(): row[1],  # "type"
-            headers[2].lower(): row[2],  # "quantity", string
-            headers[3].lower(): row[3]   # "unit"
-        }
-        # Add the dictionary to the result list
-        result.append(row_dict)
+    new_item = object.__new__
+    with _gc_paused():
+        for i, name in enumerate(names):
+            item = new_item(Item)
+            item.index = i + 1
+            item.name = name
+            item.type = types[i]
+            item.quantity = quantities[i]
+            item.unit = units[i]
+            item.shard = shard
+            item.row = i + 1
+            item.id = ids[i]
+            result.append(item)
 
     return result
 
@@ -84,6 +269,64 @@ def get_valid_index(data, prompt):
         return index
 
 
+def parse_indices(text, max_index):
+    """Parse a selection of indices such as "3, 5-9 12".
+
+    Indices are separated by commas or spaces; a range includes both
+    ends.
+
+    Args:
+        text (str): The selection entered by the user.
+        max_index (int): The highest valid index.
+
+    Returns:
+        list: The selected indices, sorted and without duplicates.
+
+    Raises:
+        ValueError: With a message for the user if a part is not a
+            number or a range between 1 and max_index.
+    """
+    indices = set()
+    # Allow spaces around the dash of a range, e.g. "5 - 9"
+    for part in re.sub(r"\s*-\s*", "-", text).replace(",", " ").split():
+        first, separator, last = part.partition("-")
+        try:
+            first = int(first)
+            last = int(last) if separator else first
+        except ValueError:
+            raise ValueError(
+                f"Invalid input '{part}'. "
+                "Please enter numbers or ranges such as 5-9."
+            ) from None
+        if not 1 <= first <= last <= max_index:
+            raise ValueError(
+                f"Invalid index '{part}'. "
+                f"Index should be between 1 and {max_index}."
+            )
+        indices.update(range(first, last + 1))
+    if not indices:
+        raise ValueError("Please enter at least one index.")
+    return sorted(indices)
+
+
+def coalesce_rows(rows):
+    """Group row numbers into contiguous ranges.
+
+    Args:
+        rows (iterable): Row numbers, in any order.
+
+    Returns:
+        list: (first_row, last_row) pairs, both inclusive, top to bottom.
+    """
+    ranges = []
+    for row in sorted(set(rows)):
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return [(first, last) for first, last in ranges]
+
+
 def get_updated_value(item_to_update, field_name, field_type):
     """Get the updated value for a specific field in an item.
 
@@ -1,7 +1,21 @@
+from itertools import repeat
 from rich.console import Console
+from modules import config
 
+# Most characters accepted in a field
+MAX_LENGTH = 20
 
-def user_input(label, available_options=None, type=None, allow_empty=False):
+# Values find_invalid checks together before looking at each of them
+BLOCK_SIZE = 1024
+
+
+def user_input(
+    label,
+    available_options=None,
+    type=None,
+    allow_empty=False,
+    max_length=MAX_LENGTH
+):
     """Prompt the user for input with validation checks.
 
     Args:
@@ -10,6 +24,7 @@ def user_input(label, available_options=None, type=None, allow_empty=False):
         user input.
         type (str, optional): The expected type of the input.
         allow_empty (bool, optional): Whether to allow empty input or not.
+        max_length (int, optional): The maximum number of characters.
 
     Returns:
         str: The user input that passes all validation checks.
@@ -19,9 +34,11 @@ def user_input(label, available_options=None, type=None, allow_empty=False):
     while True:
         user_prompt = input(label).strip()
 
-        # Check if input length exceeds 20 characters
-        if len(user_prompt) > 20:
-            console.print("\n[red]You cannot enter more than 20 characters")
+        # Check if input length exceeds the limit (20 characters by default)
+        if len(user_prompt) > max_length:
+            console.print(
+                f"\n[red]You cannot enter more than {max_length} characters"
+            )
             continue  # Skip to the next iteration and prompt the user again
 
         # Check if input is not empty when empty strings are not allowed
@@ -64,3 +81,138 @@ def is_data_valid(value, type):
         except ValueError:
             return False
     return False  # If the type is neither "text" nor "positive number"
+
+
+def find_invalid(values, type, max_length=MAX_LENGTH):
+    """Check a whole column against the rules of the input prompts.
+
+    A value must not be empty, nor longer than max_length, and must be
+    valid for is_data_valid. Blocks of values are checked with map, all
+    and any, which run no Python code per value, so valid values are
+    cheap; only a block with a problem is walked value by value.
+
+    Args:
+        values (list): The values, as stripped strings.
+        type (str): "text" or "positive number".
+        max_length (int, optional): The maximum number of characters.
+
+    Returns:
+        dict: The first problem of every invalid value by position,
+        e.g. "cannot be empty".
+
+    Raises:
+        ValueError: If the type is not known.
+    """
+    if type not in ("text", "positive number"):
+        raise ValueError(f"Unknown type '{type}'.")
+    problems = {}
+    for start in range(0, len(values), BLOCK_SIZE):
+        block = values[start:start + BLOCK_SIZE]
+        if _is_block_valid(block, type, max_length):
+            continue
+        for position, value in enumerate(block, start=start):
+            problem = _find_problem(value, type, max_length)
+            if problem:
+                problems[position] = problem
+    return problems
+
+
+def _is_block_valid(block, type, max_length):
+    if not all(block) or max(map(len, block)) > max_length:
+        return False
+    if type == "text":
+        return not any(map(str.isdigit, block))
+    try:
+        # 0.0 <= NaN is False, like in is_data_valid
+        return all(map((0.0).__le__, map(float, block)))
+    except ValueError:
+        return False
+
+
+def _find_problem(value, type, max_length):
+    # The first rule the value breaks, checked in the reported order
+    if not value:
+        return "cannot be empty"
+    if len(value) > max_length:
+        return f"cannot be more than {max_length} characters"
+    if not is_data_valid(value, type):
+        return f"must be {type}"
+    return None
+
+
+def _validate_chunk(columns, start, types, max_length):
+    # Runs in a worker process when validate_columns uses a pool
+    errors = {}
+    for name, values in columns.items():
+        problems = find_invalid(values, types[name], max_length)
+        for position, problem in problems.items():
+            errors.setdefault(start + position, []).append(
+                f"{name} {problem}"
+            )
+    return errors
+
+
+def validate_columns(
+    columns,
+    types,
+    max_length=MAX_LENGTH,
+    workers=None,
+    chunk_size=None
+):
+    """Validate many rows at once, column by column.
+
+    Every value is checked, so all the problems of all the rows are
+    reported. With several workers the rows are split into chunks that
+    are validated in parallel by a process pool; the values are copied
+    to the workers, which only pays off for large inputs.
+
+    Args:
+        columns (dict): The values of each column by name, as stripped
+            strings; every column has one value per row.
+        types (dict): The type of each column, as for find_invalid.
+        max_length (int, optional): The maximum number of characters.
+        workers (int, optional): Worker processes, VALIDATION_WORKERS by
+            default; 1 validates in this process.
+        chunk_size (int, optional): Rows per chunk sent to a worker,
+            VALIDATION_CHUNK_SIZE by default.
+
+    Returns:
+        dict: For every invalid row, by position from 0, its error
+        messages in column order, e.g. ["quantity cannot be empty"].
+    """
+    workers = workers or config.VALIDATION_WORKERS
+    chunk_size = chunk_size or config.VALIDATION_CHUNK_SIZE
+    size = len(next(iter(columns.values()), []))
+
+    if workers <= 1 or size <= chunk_size:
+        errors = _validate_chunk(columns, 0, types, max_length)
+        return dict(sorted(errors.items()))
+
+    # Imported on first use, most runs validate in this process
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    starts = range(0, size, chunk_size)
+    chunks = (
+        {
+            name: values[start:start + chunk_size]
+            for name, values in columns.items()
+        }
+        for start in starts
+    )
+    errors = {}
+    # Forking a process that runs background threads can copy a held
+    # lock, so the workers are started fresh
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        for chunk_errors in executor.map(
+            _validate_chunk,
+            chunks,
+            starts,
+            repeat(types),
+            repeat(max_length)
+        ):
+            errors.update(chunk_errors)
+    return dict(sorted(errors.items()))
@@ -0,0 +1,245 @@
+import functools
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from rich.console import Console
+from rich.table import Table
+from modules import config
+
+
+class SpanStats:
+    """Totals for every finished span of one name.
+
+    sizes sums the numeric attributes of the spans, e.g. rows read, and
+    nested counts the spans that ran inside them, e.g. the backend
+    calls made by one user action.
+    """
+
+    __slots__ = ("count", "total", "max", "sizes", "nested")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.sizes = Counter()
+        self.nested = Counter()
+
+    def to_dict(self):
+        """Return the totals as a JSON friendly dictionary."""
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0,
+            "max_ms": self.max * 1000,
+            "sizes": dict(self.sizes),
+            "nested": dict(self.nested)
+        }
+
+
+class Recorder:
+    """Collect timings and counters while profiling is enabled.
+
+    Hooks are called with (name, seconds, attributes) after every span,
+    so other tools can receive the measurements as they happen.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.spans = {}
+        self.counters = Counter()
+        self.hooks = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def stack(self):
+        """Return the names of the spans open in the current thread."""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def record(self, name, seconds, attributes, parents):
+        """Add a finished span to the totals and call the hooks."""
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            for key, value in attributes.items():
+                if isinstance(value, (int, float)):
+                    stats.sizes[key] += value
+            for parent in parents:
+                # Enclosing spans finish later, so they may be new here
+                parent_stats = self.spans.setdefault(parent, SpanStats())
+                parent_stats.nested[name] += 1
+        for hook in self.hooks:
+            hook(name, seconds, attributes)
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self.spans = {}
+            self.counters = Counter()
+
+
+RECORDER = Recorder(config.PROFILE)
+
+
+def enable():
+    """Start recording spans and counters."""
+    RECORDER.enabled = True
+
+
+def add_hook(hook):
+    """Call hook(name, seconds, attributes) after every span."""
+    RECORDER.hooks.append(hook)
+
+
+def remove_hook(hook):
+    """Stop calling a hook added with add_hook."""
+    RECORDER.hooks.remove(hook)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a block of code while profiling is enabled.
+
+    The block can add numeric attributes, e.g. the rows it read, to the
+    yielded dictionary; they are summed in the report.
+
+    Args:
+        name (str): The span name, e.g. "backend.get_all_values".
+        **attributes: Initial attributes of the span.
+
+    Yields:
+        dict: The span attributes.
+    """
+    if not RECORDER.enabled:
+        yield attributes
+        return
+
+    stack = RECORDER.stack()
+    # Every enclosing span counts this one once, even when nested twice
+    parents = set(stack)
+    parents.discard(name)
+    stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        RECORDER.record(name, seconds, attributes, parents)
+
+
+def timed(name):
+    """Decorate a function so each call is recorded as a span.
+
+    Args:
+        name (str): The span name.
+
+    Returns:
+        function: The decorator.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not RECORDER.enabled:
+                return function(*args, **kwargs)
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, amount=1):
+    """Add to a counter while profiling is enabled.
+
+    Args:
+        name (str): The counter name, e.g. "cache.hits".
+        amount (int or float): The amount to add.
+    """
+    if RECORDER.enabled:
+        with RECORDER._lock:
+            RECORDER.counters[name] += amount
+
+
+def get_report():
+    """Return everything recorded so far.
+
+    Returns:
+        dict: "spans" with the totals per span name, slowest first,
+        and "counters".
+    """
+    with RECORDER._lock:
+        spans = sorted(
+            RECORDER.spans.items(),
+            key=lambda item: item[1].total,
+            reverse=True
+        )
+        return {
+            "spans": {name: stats.to_dict() for name, stats in spans},
+            "counters": dict(RECORDER.counters)
+        }
+
+
+def export_report(path):
+    """Write the report as JSON.
+
+    Args:
+        path (str): The file to write.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(get_report(), file, indent=2)
+
+
+def print_report():
+    """Print the report as tables, e.g. at the end of a session.
+
+    The tables go to stderr, so they stay out of the CSV or JSON that
+    a command prints.
+    """
+    report = get_report()
+    table = Table(title="Profile")
+    table.add_column("Span", style="yellow")
+    table.add_column("Calls", justify="right", style="yellow")
+    table.add_column("Total (ms)", justify="right", style="yellow")
+    table.add_column("Mean (ms)", justify="right", style="yellow")
+    table.add_column("Max (ms)", justify="right", style="yellow")
+    table.add_column("Items", style="yellow")
+    for name, stats in report["spans"].items():
+        table.add_row(
+            name,
+            str(stats["count"]),
+            f"{stats['total_ms']:.1f}",
+            f"{stats['mean_ms']:.2f}",
+            f"{stats['max_ms']:.1f}",
+            " ".join(f"{k}={v:g}" for k, v in stats["sizes"].items())
+        )
+
+    # What one call of a span triggers, e.g. the requests of an update
+    nested = Table(title="Nested calls per call")
+    nested.add_column("Span", style="yellow")
+    nested.add_column("Calls made inside", style="yellow")
+    for name, stats in report["spans"].items():
+        if stats["nested"]:
+            nested.add_row(name, "\n".join(
+                f"{inner} x{calls / max(stats['count'], 1):g}"
+                for inner, calls in stats["nested"].items()
+            ))
+
+    console = Console(stderr=True)
+    console.print(table)
+    if nested.row_count:
+        console.print(nested)
+    if report["counters"]:
+        counters = Table(title="Counters")
+        counters.add_column("Counter", style="yellow")
+        counters.add_column("Value", justify="right", style="yellow")
+        for name, value in sorted(report["counters"].items()):
+            counters.add_row(name, f"{value:g}")
+        console.print(counters)
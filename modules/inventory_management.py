@@ -1,38 +1,47 @@
 from rich.console import Console
 from rich.table import Table
-from modules.input_validation import user_input
+from modules import config, instrumentation
+from modules.input_validation import is_data_valid, user_input
 from modules.google_sheets import (
     get_data,
+    get_version,
+    prefetch,
+    search_items,
+    fuzzy_search_items,
+    query_items,
     new_item_handler,
     delete_handler,
+    bulk_delete_handler,
     update_handler
 )
 from modules.helpers import (
+    parse_quantity,
     is_operation_canceled,
     get_valid_index,
+    parse_indices,
     get_updated_value
 )
+from modules.query import QueryError, is_query
 
 
-def display_items(data, table_title):
-    """Display inventory items in a formatted table using the Rich library.
+# Shared by the inventory viewer so it is not recreated for every page
+CONSOLE = Console()
+
+# Columns the viewer can sort by
+SORT_COLUMNS = ["index", "name", "type", "quantity", "unit"]
+
+
+@instrumentation.timed("render_table")
+def render_table(items, table_title):
+    """Render a single table of inventory items.
 
     Args:
-        data (list): A list of dictionaries representing inventory items,
-                     each dictionary containing keys
-                     'name', 'type', 'quantity', and 'unit'.
+        items (list): The items to render; only these rows are built.
         table_title (str): The title of the table to be displayed.
 
     Returns:
         None
     """
-    console = Console()
-
-    # If no items in inventory, display a message and prevent further execution
-    if not data:
-        console.print("[bold red]No items in inventory.[/bold red]")
-        return
-
     # Create a table
     print("\n")
     table = Table(title=table_title)
@@ -43,23 +52,170 @@ def display_items(data, table_title):
     table.add_column("Type", style="yellow")
     table.add_column("Quantity", justify="right", style="yellow")
     table.add_column("Unit", style="yellow")
+    show_location = len(config.SHARDS) > 1
+    if show_location:
+        table.add_column("Location", style="yellow")
 
-    # Iterate over each item in the data list
-    for item in data:
-        # Add a row to the table for each item
-        table.add_row(
+    # Iterate over each item in the page
+    for item in items:
+        row = [
             str(item["index"]),
             item["name"],
             item["type"],
             item["quantity"],
             item["unit"]
-        )
+        ]
+        if show_location:
+            row.append(item.get("shard") or "")
+        # Add a row to the table for each item
+        table.add_row(*row)
         table.add_section()  # Add a horizontal line after each row
 
     # Print the table to the console
-    console.print(table, "\n")
+    CONSOLE.print(table, "\n")
+
+
+def sort_key(column):
+    """Build a sort key for one of the viewer columns.
+
+    Quantities sort numerically, with non-numeric values last.
+
+    Args:
+        column (str): One of SORT_COLUMNS.
 
+    Returns:
+        function: A key function for sorted().
+    """
+    if column == "quantity":
+        def quantity_key(item):
+            quantity = parse_quantity(item["quantity"])
+            if isinstance(quantity, float):
+                return (0, quantity, "")
+            return (1, 0.0, quantity)
+        return quantity_key
+    if column == "index":
+        return lambda item: item["index"]
+    return lambda item: item[column].lower()
+
+
+@instrumentation.timed("display_items")
+def display_items(data, table_title, page_size=None, reload=None):
+    """Display inventory items in a formatted table using the Rich library.
 
+    Inventories longer than one page are shown in a paged viewer that
+    only renders the visible page. The user can move with 'n' (next),
+    'p' (previous), 'j <page>' (jump), sort with 's <column>' (repeat
+    to reverse the order) and leave with 'q'.
+
+    Args:
+        data (list): A list of dictionaries representing inventory items,
+                     each dictionary containing keys
+                     'name', 'type', 'quantity', and 'unit'.
+        table_title (str): The title of the table to be displayed.
+        page_size (int, optional): Rows per page, PAGE_SIZE by default.
+        reload (function, optional): Returns the current items. It is
+            called when the inventory is reloaded while paging, e.g.
+            after a background refresh, so the view shows the new items.
+
+    Returns:
+        None
+    """
+    # If no items in inventory, display a message and prevent further execution
+    if not data:
+        CONSOLE.print("[bold red]No items in inventory.[/bold red]")
+        return
+
+    page_size = page_size or config.PAGE_SIZE
+    if len(data) <= page_size:
+        render_table(data, table_title)
+        return
+
+    items = data
+    sorted_by = None
+    page_count = (len(items) - 1) // page_size + 1
+    page = 0
+    version = get_version()
+
+    while True:
+        if reload is not None and get_version() != version:
+            version = get_version()
+            data = reload() or []
+            if not data:
+                CONSOLE.print("[bold red]No items in inventory.[/bold red]")
+                return
+            items = data
+            if sorted_by is not None:
+                items = sorted(data, key=sort_key(sorted_by))
+            page_count = (len(items) - 1) // page_size + 1
+            page = min(page, page_count - 1)
+            CONSOLE.print("\n[yellow]The inventory was refreshed.")
+
+        start = page * page_size
+        title = f"{table_title} (page {page + 1} of {page_count})"
+        render_table(items[start:start + page_size], title)
+
+        CONSOLE.print(
+            "[green][bold]n[/bold][/green] Next | "
+            "[green][bold]p[/bold][/green] Previous | "
+            "[green][bold]j <page>[/bold][/green] Jump | "
+            "[green][bold]s <column>[/bold][/green] Sort | "
+            "[green][bold]q[/bold][/green] Quit"
+        )
+        command = user_input("Page command: ", allow_empty=True).lower()
+        action, _, argument = command.partition(" ")
+        argument = argument.strip()
+
+        if action in ("", "n"):
+            page = min(page + 1, page_count - 1)
+        elif action == "p":
+            page = max(page - 1, 0)
+        elif action == "j":
+            try:
+                page = min(max(int(argument), 1), page_count) - 1
+            except ValueError:
+                CONSOLE.print(f"\n[red]Invalid page '{argument}'.")
+        elif action == "s":
+            if argument not in SORT_COLUMNS:
+                columns = ", ".join(SORT_COLUMNS)
+                CONSOLE.print(f"\n[red]Sort by one of: {columns}.")
+                continue
+            # Sorting the same column again reverses the order
+            reverse = sorted_by == argument
+            items = sorted(data, key=sort_key(argument), reverse=reverse)
+            sorted_by = None if reverse else argument
+            page = 0
+        elif action == "q":
+            return
+        else:
+            CONSOLE.print(f"\n[red]Unknown command '{command}'.")
+
+
+def choose_location():
+    """Ask which location (worksheet) to work with.
+
+    Only asked when the inventory is split over several locations.
+
+    Returns:
+        str or None: The chosen location, an empty string for all
+        locations, or None if the user canceled.
+    """
+    if len(config.SHARDS) == 1:
+        return ""
+
+    console = Console()
+    console.print(f"[blue]Locations: {', '.join(config.SHARDS)}")
+    location = user_input(
+        "Location (empty for all): ",
+        available_options=config.SHARDS + ["", "c"],
+        allow_empty=True,
+        max_length=255
+    )
+    if is_operation_canceled(location, "c"):
+        return None
+    return location
+
+
+@instrumentation.timed("action.search_inventory")
 def search_inventory():
     """Search for items in the inventory by name or perform other operations.
 
@@ -86,7 +242,12 @@ def search_inventory():
         menu = " | ".join(options)
         console.print(menu)
 
-        query = user_input("Search by name (or choose an operation): ")
+        # Refresh the data and search indexes while the user types
+        prefetch()
+        query = user_input(
+            "Search by name or query (or choose an operation): ",
+            max_length=100
+        )
 
         # Abort search operation and return to operations menu
         if is_operation_canceled(query, "c"):
@@ -104,24 +265,35 @@ def search_inventory():
             display_help()
             continue
 
-        data = get_data()
-        results = [
-            item
-            for item in data
-            if query.lower() in item["name"].lower()
-        ]
+        if is_query(query):
+            try:
+                results = query_items(query)
+            except QueryError as e:
+                console.print(f"\n[red]{str(e)}")
+                continue
+            if results:
+                display_items(results, f'Query results for "{query}"')
+            else:
+                console.print(f"\n[red]No items match [bold]'{query}'.\n")
+            continue
 
-        filtered_data = []
+        results = search_items(query)
         if results:
             # Render results and continue search loop
-            for item in results:
-                filtered_data.append(item)
             table_title = f'Search results for "{query}"'
-            display_items(filtered_data, table_title)
+            display_items(results, table_title)
+            continue
+
+        # No exact match; offer the closest names and types instead
+        results = fuzzy_search_items(query)
+        if results:
+            table_title = f'Closest matches for "{query}"'
+            display_items(results, table_title)
         else:
             console.print(f"\n[red]No items found for [bold]'{query}'.\n")
 
 
+@instrumentation.timed("action.add_new_item")
 def add_new_item():
     """Add a new item to the inventory.
 
@@ -156,6 +328,11 @@ def add_new_item():
     if is_operation_canceled(item_unit, "c"):
         return
 
+    location = choose_location()
+    if location is None:
+        return
+    location = location or config.SHARDS[0]
+
     data = get_data()
 
     item_to_save = [{
@@ -163,7 +340,8 @@ def add_new_item():
         "name": item_name,
         "type": item_type,
         "quantity": item_quantity,
-        "unit": item_unit
+        "unit": item_unit,
+        "shard": location
     }]
 
     table_title = "Item to save:"
@@ -173,20 +351,23 @@ def add_new_item():
     user_conf = user_input(conf_message, available_options=['y', 'n'])
     if user_conf.lower() == 'y':
         item_values = (item_name, item_type, item_quantity, item_unit)
-        new_item_handler(item_values)
+        new_item_handler(item_values, location)
     elif user_conf.lower() == 'n':
         console.print("[yellow]Operation aborted!\n")
         return  # Exit the function after aborting the operation
 
 
+@instrumentation.timed("action.delete_item")
 def delete_item():
-    """Delete an item from the inventory.
+    """Delete one or more items from the inventory.
 
-    The function prompts the user to enter the index of the item
-    they want to delete.
-    It validates the input index and ensures that the user has
+    The function prompts the user for the items to delete: an index,
+    a list of indices and ranges such as "3, 5-9", or a query such as
+    "type:paint quantity:0".
+    It validates the selection and ensures that the user has
     the option to cancel the operation.
-    After confirming the deletion, the item is removed from the inventory.
+    After a single confirmation, the items are removed from the inventory
+    in one batch.
 
     Returns:
         None
@@ -194,32 +375,62 @@ def delete_item():
     console = Console()
     data = get_data()
 
-    console.print("\n[blue bold underline]Delete item")
+    console.print("\n[blue bold underline]Delete items")
     console.print("[blue]Enter details or 'c' to cancel:[/blue]\n")
 
     while True:
-        item_index = get_valid_index(data, "Enter the index to delete an item")
-        if item_index is None:
+        selection = user_input(
+            f"Enter the indices to delete (1 - {len(data)}), "
+            "e.g. 3, 5-9, or a query: ",
+            max_length=100
+        )
+        if is_operation_canceled(selection, "c"):
             return
 
-        # Delete
-        item_to_delete = data[item_index - 1]  # Adjust for 0-based indexing
-
+        if is_query(selection):
+            try:
+                items_to_delete = query_items(selection)
+            except QueryError as e:
+                console.print(f"\n[red]{str(e)}")
+                continue
+            if not items_to_delete:
+                console.print(f"\n[red]No items match [bold]'{selection}'.")
+                continue
+        else:
+            try:
+                indices = parse_indices(selection, len(data))
+            except ValueError as e:
+                console.print(f"\n[red]{str(e)}")
+                continue
+            # Adjust for 0-based indexing
+            items_to_delete = [data[index - 1] for index in indices]
+        break
+
+    if len(items_to_delete) == 1:
         console.print("\n[bold red]You are about to delete this item:")
-        display_items([item_to_delete], "")
-
         delete_message = "Are you sure you want to delete this item? (y/n)"
-        available_options = ['y', 'n']
-        delete_confirmation = user_input(delete_message, available_options)
-        if delete_confirmation.lower() == 'y':
-            # Remove the item from the data list
-            delete_handler(item_index)
-            break  # Exit the loop after handling the deletion
-        else:
-            console.print("\n[yellow]Deletion canceled!\n")
-            return  # Exit the function after cancellation
+    else:
+        count = len(items_to_delete)
+        console.print(f"\n[bold red]You are about to delete {count} items:")
+        delete_message = (
+            f"Are you sure you want to delete {count} items? (y/n)"
+        )
+    display_items(items_to_delete, "")
+
+    available_options = ['y', 'n']
+    delete_confirmation = user_input(delete_message, available_options)
+    if delete_confirmation.lower() != 'y':
+        console.print("\n[yellow]Deletion canceled!\n")
+        return
+
+    item_ids = [item.id for item in items_to_delete]
+    if len(item_ids) == 1:
+        delete_handler(item_ids[0])
+    else:
+        bulk_delete_handler(item_ids)
 
 
+@instrumentation.timed("action.update_item")
 def update_item():
     """Update an existing item in the inventory.
 
@@ -289,7 +500,11 @@ def update_item():
         available_options = ['y', 'n']
         user_confirmation = user_input(confirmation_message, available_options)
         if user_confirmation.lower() == 'y':
-            update_handler(index_to_update, updated_item[0])
+            update_handler(
+                item_to_update.id,
+                updated_item[0],
+                item_to_update
+            )
         elif user_confirmation.lower() == 'n':
             console.print("\n[yellow]Operation aborted!\n")
             return  # Exit the function after aborting the operation
@@ -297,6 +512,85 @@ def update_item():
         break  # Exit the loop after handling the update
 
 
+@instrumentation.timed("action.import_from_file")
+def import_from_file():
+    """Import items from a CSV or JSONL file chosen by the user.
+
+    Returns:
+        None
+    """
+    console = Console()
+
+    console.print("\n[blue bold underline]Import items")
+    console.print("[blue]Enter a .csv or .jsonl file path or 'c' to cancel:\n")
+
+    path = user_input("File to import: ", max_length=255)
+    if is_operation_canceled(path, "c"):
+        return
+
+    from modules.bulk_io import import_items
+    import_items(path)
+
+
+@instrumentation.timed("action.export_to_file")
+def export_to_file():
+    """Export the inventory to a CSV or JSONL file chosen by the user.
+
+    Returns:
+        None
+    """
+    console = Console()
+
+    console.print("\n[blue bold underline]Export items")
+    console.print("[blue]Enter a .csv or .jsonl file path or 'c' to cancel:\n")
+
+    path = user_input("File to export to: ", max_length=255)
+    if is_operation_canceled(path, "c"):
+        return
+
+    from modules.bulk_io import export_items
+    export_items(path)
+
+
+@instrumentation.timed("action.view_reports")
+def view_reports():
+    """Show stock totals by type and unit and the low stock items.
+
+    Returns:
+        None
+    """
+    console = Console()
+
+    console.print("\n[blue bold underline]Stock reports")
+    console.print(
+        "[blue]Enter a low stock threshold, leave empty for "
+        f"{config.LOW_STOCK_THRESHOLD:g} or 'c' to cancel:\n"
+    )
+    while True:
+        # Validated here, as a typed prompt would not accept 'c'
+        threshold = user_input("Low stock threshold: ", allow_empty=True)
+        if is_operation_canceled(threshold, "c"):
+            return
+        if not threshold or is_data_valid(threshold, "positive number"):
+            break
+        console.print("\n[red]The value must be positive number")
+    threshold = float(threshold) if threshold else None
+
+    data = get_data()
+    if data is None:
+        return
+
+    from modules.reports import build_report, print_report
+    report = build_report(data)
+    print_report(report, threshold)
+
+    if threshold is None:
+        threshold = config.LOW_STOCK_THRESHOLD
+    low_stock = report.below(threshold)
+    if low_stock:
+        display_items(low_stock, f"Low stock (at or below {threshold:g})")
+
+
 def display_help():
     """Display a help section providing information about
     the Inventory Management System.
@@ -319,6 +613,8 @@ def display_help():
     [bold underline]Main Menu Options:[/bold underline]
     [bold]1. View Inventory:[/bold]
       - Displays the current inventory items.
+      - Large inventories are shown page by page: 'n' next, 'p' previous,
+        'j <page>' jump, 's <column>' sort (repeat to reverse), 'q' quit.
     [bold]2. Operations:[/bold]
       - Navigate to the operations menu to manage inventory items.
     [bold]9. Help:[/bold]
@@ -338,16 +634,30 @@ def display_help():
       - You can leave the prompt empty to keep the previous value.
       - You can cancel the operation at any time by entering 'c'.
     [bold]3. Delete:[/bold]
-      - Select this option to delete an item from the inventory.
-      - You will be prompted to enter the index of the item you wish to delete.
-      - You will be asked to confirm the deletion.
+      - Select this option to delete items from the inventory.
+      - Enter the index of the item you wish to delete, several indices
+        and ranges such as '3, 5-9', or a query such as 'type:paint'.
+      - You will be asked once to confirm the deletion.
       - You can cancel the operation at any time by entering 'c'.
     [bold]4. Search:[/bold]
       - Select this option to search for items in the inventory.
       - This operation will run until you choose to return to the main menu.
       - You can search by entering the name of the item.
+      - Or query the fields, e.g. 'type:tools quantity<5 name~drill':
+        ':' matches the whole value, '~' part of it, and quantity
+        takes < <= > >= as well. Quote values with spaces.
       - You can also select one of the other operations (Add, Update, Delete).
       - You can cancel the operation at any time by entering 'c'.
+    [bold]5. Import:[/bold]
+      - Select this option to add many items from a .csv or .jsonl file.
+      - The file needs name, type, quantity and unit columns (or keys).
+      - Rows that fail validation are reported and skipped.
+    [bold]6. Export:[/bold]
+      - Select this option to save the inventory to a .csv or .jsonl file.
+    [bold]7. Reports:[/bold]
+      - Shows item counts and total, lowest and highest quantities
+        by type and unit.
+      - Lists the items at or below a low stock threshold.
     [bold]9. Help:[/bold]
       - Displays this help section.
     [bold]0. Back:[/bold]
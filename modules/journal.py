@@ -0,0 +1,239 @@
+import json
+import os
+import threading
+import time
+from modules import config, instrumentation
+from modules.storage import FIELDS, REVISION_COLUMN, get_backend
+
+
+class Journal:
+    """A local write-ahead log of inventory changes.
+
+    Every change is appended to the journal file and synced to disk
+    before it is applied to the local view, so it survives crashes and
+    network outages. A background thread sends the logged changes to
+    the storage backend in batches and drops them from the journal once
+    they are saved.
+
+    Entries are dictionaries with an "op" of "add", "update" or
+    "delete", the "shard" and the item "id":
+      - add: "values" (name, type, quantity, unit) and "revision"
+      - update: "fields" (the changed fields only) and "revision"
+      - delete: nothing else
+
+    Sending entries is idempotent: rows are found by their item ID, so
+    entries that were saved just before a crash are skipped or applied
+    again with the same result when the journal is replayed.
+
+    Sending holds flush_lock; hold it too while writing rows by number
+    to keep a flush from shifting them.
+
+    Args:
+        path (str): The journal file.
+        flush_interval (float): Seconds between two flush attempts,
+            also the delay before retrying a failed flush.
+    """
+
+    def __init__(self, path, flush_interval):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.entries = self._read()
+        self._lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _read(self):
+        # A crash can leave a partly written last line, which is dropped
+        entries = []
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def append(self, entries):
+        """Log changes, returning once they are safely on disk.
+
+        Args:
+            entries (list): The entries to log.
+
+        Raises:
+            OSError: If the journal cannot be written.
+        """
+        lines = "".join(json.dumps(entry) + "\n" for entry in entries)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(lines)
+                file.flush()
+                os.fsync(file.fileno())
+            self.entries.extend(entries)
+        self._wake.set()
+
+    def pending(self):
+        """Return the entries that are not saved to the backend yet."""
+        with self._lock:
+            return list(self.entries)
+
+    def has_pending(self):
+        """Tell whether some entries are not saved to the backend yet."""
+        return bool(self.entries)
+
+    def _discard(self, count):
+        # Drop the first count entries and rewrite the journal atomically
+        with self._lock:
+            self.entries = self.entries[count:]
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as file:
+                for entry in self.entries:
+                    file.write(json.dumps(entry) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+
+    @instrumentation.timed("journal.flush")
+    def flush(self):
+        """Send every pending entry to the storage backend now.
+
+        Returns:
+            bool: True if the journal is empty afterwards.
+
+        Raises:
+            StorageError: If the backend rejects the changes; they stay
+            in the journal and are sent again later.
+        """
+        with self.flush_lock:
+            entries = self.pending()
+            if entries:
+                send_entries(entries)
+                self._discard(len(entries))
+        return not self.pending()
+
+    def start(self):
+        """Start the background thread sending pending entries."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="inventory-journal",
+                    daemon=True
+                )
+                self._thread.start()
+        if self.entries:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Offline, rejected or failing for any other reason: the
+                # entries stay logged, so try again after the interval
+                # rather than letting the thread die
+                self._wake.set()
+            # Changes made meanwhile are sent together in the next batch
+            time.sleep(self.flush_interval)
+
+
+def fold_entries(entries):
+    """Combine entries so every item is changed by at most one operation.
+
+    Args:
+        entries (list): Journal entries in the order they were logged.
+
+    Returns:
+        dict: shard -> {item ID: combined entry}, in first-change order.
+    """
+    shards = {}
+    for entry in entries:
+        items = shards.setdefault(entry["shard"], {})
+        previous = items.get(entry["id"])
+        if entry["op"] != "update" or previous is None:
+            # Deletes win over earlier changes; deleting an item that
+            # was never saved is skipped when the entries are sent
+            items[entry["id"]] = dict(entry)
+        elif previous["op"] == "add":
+            values = dict(zip(FIELDS, previous["values"]))
+            values.update(entry["fields"])
+            previous["values"] = [values[field] for field in FIELDS]
+            previous["revision"] = entry["revision"]
+        elif previous["op"] == "update":
+            previous["fields"] = {**previous["fields"], **entry["fields"]}
+            previous["revision"] = entry["revision"]
+    return shards
+
+
+def send_entries(entries):
+    """Apply journal entries to the storage backend.
+
+    Each shard takes one read of its ID column, one request for all
+    updates, one for all deleted rows and one for all new items. The
+    backend checks the rows read first again before writing to them.
+
+    Args:
+        entries (list): Journal entries in the order they were logged.
+
+    Raises:
+        StorageError: If the backend cannot be read or written.
+    """
+    for shard, items in fold_entries(entries).items():
+        backend = get_backend(shard)
+        rows = backend.find_rows(list(items))
+
+        cells = []
+        deleted = []
+        new_rows = []
+        for item_id, entry in items.items():
+            if entry["op"] == "add" and item_id not in rows:
+                new_rows.append(
+                    list(entry["values"]) + [entry["revision"], item_id]
+                )
+            elif entry["op"] == "update" and item_id in rows:
+                cells.extend(
+                    (item_id, FIELDS.index(field) + 1, value)
+                    for field, value in entry["fields"].items()
+                )
+                cells.append((item_id, REVISION_COLUMN, entry["revision"]))
+            elif entry["op"] == "delete" and item_id in rows:
+                deleted.append(item_id)
+
+        # Updates leave the rows found above in place, so they go first
+        if cells:
+            backend.update_items(cells, rows)
+        if deleted:
+            backend.delete_items(deleted, rows)
+        if new_rows:
+            backend.append_rows(new_rows)
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """Return the write-ahead journal, starting its flush thread.
+
+    Returns:
+        Journal: The shared journal of this process.
+    """
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = Journal(
+                config.JOURNAL_PATH,
+                config.JOURNAL_FLUSH_INTERVAL
+            )
+            _journal.start()
+        return _journal
+
+
+def is_enabled():
+    """Tell whether writes go through the journal (INVENTORY_WRITES)."""
+    return config.WRITE_MODE == "journal"
@@ -1,10 +1,14 @@
 from rich.console import Console
+from modules.google_sheets import prefetch
 from modules.input_validation import user_input
 from modules.inventory_management import (
     add_new_item,
     update_item,
     delete_item,
     search_inventory,
+    import_from_file,
+    export_to_file,
+    view_reports,
     display_help
 )
 
@@ -31,6 +35,8 @@ def main_menu():
 
     choices = ["1", "2", "9", "0"]
 
+    # Load the inventory while the user chooses
+    prefetch()
     return user_input("Choose an operation: ", choices)
 
 
@@ -53,13 +59,17 @@ def operations_menu():
             "[green][bold]2.[/green][/bold] Update",
             "[green][bold]3.[/green][/bold] Delete",
             "[green][bold]4.[/green][/bold] Search",
+            "[green][bold]5.[/green][/bold] Import",
+            "[green][bold]6.[/green][/bold] Export",
+            "[green][bold]7.[/green][/bold] Reports",
             "[green][bold]9.[/green][/bold] Help",
             "[green][bold]0.[/green][/bold] Back",
         ]
         menu = " | ".join(options)
         console.print(menu)
 
-        available_options = ["1", "2", "3", "4", "9", "0"]
+        available_options = ["1", "2", "3", "4", "5", "6", "7", "9", "0"]
+        prefetch()
         selection = user_input("Select an option: ", available_options)
 
         if selection == '0':
@@ -72,5 +82,11 @@ def operations_menu():
             delete_item()
         elif selection == '4':
             search_inventory()
+        elif selection == '5':
+            import_from_file()
+        elif selection == '6':
+            export_to_file()
+        elif selection == '7':
+            view_reports()
         elif selection == '9':
             display_help()
@@ -0,0 +1,318 @@
+import re
+import shlex
+from operator import attrgetter
+
+# A term is a field, an operator and a value, e.g. "quantity<5"
+TERM_PATTERN = re.compile(
+    r"(name|type|quantity|unit)(<=|>=|[:=~<>])(.*)",
+    re.IGNORECASE | re.DOTALL
+)
+
+TEXT_OPERATORS = (":", "=", "~")
+NUMBER_OPERATORS = (":", "=", "<", "<=", ">", ">=")
+
+# A name search verifies and sorts every trigram candidate in Python,
+# so its estimate is weighted by this much when planning
+NAME_SEARCH_COST = 4
+
+# Intersecting with a range walks the whole range in C, while checking
+# a candidate runs Python code; this is roughly how many range entries
+# cost as much as one check
+RANGE_INTERSECT_RATIO = 8
+
+
+class QueryError(Exception):
+    """Raised when a query cannot be parsed."""
+
+
+class TextClause:
+    """A condition on a text field, ignoring case.
+
+    ":" and "=" match the whole value, "~" any part of it. type and
+    unit are looked up in a hash index, name in the trigram index.
+
+    Args:
+        field (str): "name", "type" or "unit".
+        operator (str): ":", "=" or "~".
+        value (str): The text to match.
+    """
+
+    def __init__(self, field, operator, value):
+        self.field = field
+        self.contains = operator == "~"
+        self.value = value.lower()
+        self.cost = NAME_SEARCH_COST if field == "name" else 1
+
+    def matches(self, item):
+        """Return True if the item meets the condition."""
+        value = getattr(item, self.field).lower()
+        if self.contains:
+            return self.value in value
+        return value == self.value
+
+    def _values(self, index):
+        if self.contains:
+            return index.matching_values(lambda value: self.value in value)
+        return [self.value]
+
+    def estimate(self, indexes):
+        """Return an upper bound of the matching items, cheaply."""
+        index = indexes[self.field]
+        if self.field == "name":
+            return index.estimate(self.value)
+        return index.count(self._values(index))
+
+    def lookup(self, indexes):
+        """Return the set of matching items, from the index."""
+        index = indexes[self.field]
+        if self.field == "name":
+            return {
+                item
+                for item in index.search(self.value)
+                if self.contains or self.matches(item)
+            }
+        return index.lookup(self._values(index))
+
+    def should_intersect(self, estimate, candidates):
+        """Tell whether intersecting beats checking every candidate."""
+        # Set intersections only walk the smaller set, while a name
+        # search can cost far more than checking a few candidates
+        return self.field != "name"
+
+    def intersect(self, indexes, candidates):
+        """Return the candidates that meet the condition."""
+        return candidates & self.lookup(indexes)
+
+
+class QuantityClause:
+    """A range of the numeric quantity, using the sorted index.
+
+    Items whose quantity is not a number never match.
+
+    Args:
+        low (float, optional): The lower bound, None for no bound.
+        high (float, optional): The upper bound, None for no bound.
+        include_low (bool): Whether low itself matches.
+        include_high (bool): Whether high itself matches.
+    """
+
+    field = "quantity"
+    cost = 1
+
+    def __init__(self, low=None, high=None, include_low=True,
+                 include_high=True):
+        self.low = low
+        self.high = high
+        self.include_low = include_low
+        self.include_high = include_high
+
+    @classmethod
+    def from_operator(cls, operator, value):
+        """Build the clause of a comparison, e.g. ("<=", 5.0)."""
+        if operator in (":", "="):
+            return cls(value, value)
+        if operator in ("<", "<="):
+            return cls(high=value, include_high=operator == "<=")
+        return cls(low=value, include_low=operator == ">=")
+
+    def narrow(self, other):
+        """Restrict the range to the part shared with another clause."""
+        if other.low is not None and (
+            self.low is None
+            or other.low > self.low
+            or (other.low == self.low and not other.include_low)
+        ):
+            self.low = other.low
+            self.include_low = other.include_low
+        if other.high is not None and (
+            self.high is None
+            or other.high < self.high
+            or (other.high == self.high and not other.include_high)
+        ):
+            self.high = other.high
+            self.include_high = other.include_high
+
+    def matches(self, item):
+        """Return True if the item meets the condition."""
+        quantity = item.quantity
+        if quantity.__class__ is not float:
+            return False
+        if self.low is not None and (
+            quantity < self.low
+            or (quantity == self.low and not self.include_low)
+        ):
+            return False
+        if self.high is not None and (
+            quantity > self.high
+            or (quantity == self.high and not self.include_high)
+        ):
+            return False
+        return quantity == quantity  # False for NaN
+
+    def _bounds(self, index):
+        return index.bounds(
+            self.low,
+            self.high,
+            self.include_low,
+            self.include_high
+        )
+
+    def estimate(self, indexes):
+        """Return the number of matching items, from two bisections."""
+        start, end = self._bounds(indexes["quantity"])
+        return end - start
+
+    def lookup(self, indexes):
+        """Return the set of matching items, from the index."""
+        index = indexes["quantity"]
+        return set(index.lookup(*self._bounds(index)))
+
+    def should_intersect(self, estimate, candidates):
+        """Tell whether intersecting beats checking every candidate."""
+        return estimate <= RANGE_INTERSECT_RATIO * len(candidates)
+
+    def intersect(self, indexes, candidates):
+        """Return the candidates that meet the condition."""
+        index = indexes["quantity"]
+        return candidates.intersection(index.lookup(*self._bounds(index)))
+
+
+class Query:
+    """A parsed query; items have to meet every clause.
+
+    Conditions on the quantity are merged into a single range.
+
+    Args:
+        clauses (list): TextClause and QuantityClause conditions.
+    """
+
+    def __init__(self, clauses):
+        self.clauses = []
+        quantity = None
+        for clause in clauses:
+            if clause.field != "quantity":
+                self.clauses.append(clause)
+            elif quantity is None:
+                quantity = clause
+                self.clauses.append(clause)
+            else:
+                quantity.narrow(clause)
+
+    def run(self, indexes):
+        """Find the matching items, most selective index first.
+
+        Every clause estimates its matches from its index, which costs
+        a dictionary lookup or a bisection, weighted by the cost of
+        reading a match. The cheapest one supplies the candidate items.
+        The others either intersect them with their own matches, a set
+        operation that does not run Python code per item, or are
+        checked on the remaining candidates when that is cheaper. A
+        query therefore costs about as much as its most selective clause.
+
+        Args:
+            indexes (dict): The name (TrigramIndex), type and unit
+                (HashIndex) and quantity (SortedIndex) indexes.
+
+        Returns:
+            list: The matching items, ordered by index.
+        """
+        planned = sorted(
+            (clause.estimate(indexes) * clause.cost, position, clause)
+            for position, clause in enumerate(self.clauses)
+        )
+        cost, _, first = planned[0]
+        if cost == 0:
+            return []
+
+        candidates = first.lookup(indexes)
+        checks = []
+        for cost, _, clause in planned[1:]:
+            estimate = cost / clause.cost
+            if clause.should_intersect(estimate, candidates):
+                candidates = clause.intersect(indexes, candidates)
+            else:
+                checks.append(clause.matches)
+            if not candidates:
+                return []
+
+        results = list(candidates)
+        for check in checks:
+            results = [item for item in results if check(item)]
+        results.sort(key=attrgetter("index"))
+        return results
+
+
+def parse_term(term):
+    """Parse one term of a query into a clause.
+
+    Args:
+        term (str): E.g. "type:tools", "quantity>=10" or "drill".
+
+    Returns:
+        TextClause or QuantityClause: The condition.
+
+    Raises:
+        QueryError: If the term is not valid.
+    """
+    match = TERM_PATTERN.fullmatch(term)
+    if match is None:
+        # A bare word searches the names
+        return TextClause("name", "~", term)
+
+    field, operator, value = match.groups()
+    field = field.lower()
+    if not value:
+        raise QueryError(f"Missing value in '{term}'.")
+    if field == "quantity":
+        if operator not in NUMBER_OPERATORS:
+            raise QueryError(
+                f"Use one of {' '.join(NUMBER_OPERATORS)} with quantity."
+            )
+        try:
+            number = float(value)
+        except ValueError:
+            raise QueryError(f"'{value}' is not a number.") from None
+        return QuantityClause.from_operator(operator, number)
+    if operator not in TEXT_OPERATORS:
+        raise QueryError(f"Use one of : = ~ with {field}.")
+    return TextClause(field, operator, value)
+
+
+def parse_query(text):
+    """Parse a query such as `type:tools quantity<5 name~drill`.
+
+    Terms are separated by spaces and must all match. Each is a field
+    (name, type, quantity or unit), an operator and a value; quote the
+    value if it has spaces, e.g. `name:"claw hammer"`. Text fields take
+    ":" or "=" for the whole value and "~" for part of it, ignoring
+    case; quantity takes ":", "=", "<", "<=", ">" and ">=". A word on
+    its own matches names containing it.
+
+    Args:
+        text (str): The query.
+
+    Returns:
+        Query: The parsed query.
+
+    Raises:
+        QueryError: If the query is empty or a term is not valid.
+    """
+    try:
+        terms = shlex.split(text)
+    except ValueError as e:
+        raise QueryError(f"Invalid query: {str(e)}.") from None
+    if not terms:
+        raise QueryError("The query is empty.")
+    return Query([parse_term(term) for term in terms])
+
+
+def is_query(text):
+    """Tell whether text uses the query syntax rather than plain words.
+
+    Args:
+        text (str): The text entered in a search.
+
+    Returns:
+        bool: True if any word is a field condition, e.g. "unit:kg".
+    """
+    return any(TERM_PATTERN.fullmatch(word) for word in text.split())
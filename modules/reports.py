@@ -0,0 +1,238 @@
+import math
+from array import array
+from rich.console import Console
+from rich.table import Table
+from modules import config, instrumentation
+
+
+def json_number(value):
+    """Return a number JSON can hold; inf and NaN become "inf", "nan".
+
+    json.dumps would write them as Infinity and NaN, which are not JSON.
+    """
+    if value is None or math.isfinite(value):
+        return value
+    return str(value)
+
+
+class GroupStats:
+    """Quantity totals for one group of items, e.g. one type.
+
+    count is the number of items in the group, while total, minimum and
+    maximum only cover the numeric quantities, counted by numeric.
+    """
+
+    __slots__ = ("count", "numeric", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.numeric = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def merge(self, other):
+        """Add the totals of another group to this one."""
+        self.count += other.count
+        self.numeric += other.numeric
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def to_dict(self):
+        """Return the totals as a JSON friendly dictionary."""
+        return {
+            "count": self.count,
+            "sum": json_number(self.total),
+            "min": json_number(self.minimum) if self.numeric else None,
+            "max": json_number(self.maximum) if self.numeric else None
+        }
+
+
+class QuantityReport:
+    """Stock levels of an inventory, computed in one pass.
+
+    The pass copies every quantity into a numeric array, with NaN for
+    quantities that are not numbers, and fills the totals of every
+    (type, unit) pair. The totals per type and per unit are merged from
+    those few groups, and threshold filters run over the array, so no
+    report needs another pass over the items or parses a quantity again.
+
+    Args:
+        data (list): The inventory items.
+    """
+
+    def __init__(self, data):
+        self.items = data
+        self.quantities = array("d")
+        self.groups = {}
+        self.unparsed = 0
+
+        append = self.quantities.append
+        groups = self.groups
+        nan = math.nan
+        for item in data:
+            key = (item.type, item.unit)
+            stats = groups.get(key)
+            if stats is None:
+                stats = groups[key] = GroupStats()
+            stats.count += 1
+            quantity = item.quantity
+            if quantity.__class__ is not float or quantity != quantity:
+                self.unparsed += 1
+                append(nan)
+                continue
+            append(quantity)
+            stats.numeric += 1
+            stats.total += quantity
+            if quantity < stats.minimum:
+                stats.minimum = quantity
+            if quantity > stats.maximum:
+                stats.maximum = quantity
+
+    def group_by(self, field):
+        """Return the totals per type, per unit, or per both.
+
+        Sums only add up quantities of the same unit, so the totals per
+        type are best read together with the type and unit breakdown.
+
+        Args:
+            field (str): "type", "unit" or "type_unit".
+
+        Returns:
+            dict: GroupStats by group, sorted by group.
+        """
+        if field == "type_unit":
+            return dict(sorted(self.groups.items()))
+        position = ("type", "unit").index(field)
+        merged = {}
+        for key, stats in self.groups.items():
+            group = key[position]
+            if group not in merged:
+                merged[group] = GroupStats()
+            merged[group].merge(stats)
+        return dict(sorted(merged.items()))
+
+    def totals(self):
+        """Return the totals over the whole inventory."""
+        stats = GroupStats()
+        for group in self.groups.values():
+            stats.merge(group)
+        return stats
+
+    def below(self, threshold):
+        """Find the items whose quantity is at or below a threshold.
+
+        Items without a numeric quantity are left out, as NaN never
+        compares true.
+
+        Args:
+            threshold (float): The highest quantity to include.
+
+        Returns:
+            list: The matching items, in inventory order.
+        """
+        items = self.items
+        return [
+            items[position]
+            for position, quantity in enumerate(self.quantities)
+            if quantity <= threshold
+        ]
+
+    def to_dict(self, threshold):
+        """Return every report as a JSON friendly dictionary.
+
+        Args:
+            threshold (float): The low stock threshold.
+
+        Returns:
+            dict: Totals, the groups by type, unit and both, and the
+            indices of the low stock items.
+        """
+        return {
+            "totals": self.totals().to_dict(),
+            "unparsed": self.unparsed,
+            "by_type": {
+                group: stats.to_dict()
+                for group, stats in self.group_by("type").items()
+            },
+            "by_unit": {
+                group: stats.to_dict()
+                for group, stats in self.group_by("unit").items()
+            },
+            "by_type_unit": [
+                dict(type=group[0], unit=group[1], **stats.to_dict())
+                for group, stats in self.group_by("type_unit").items()
+            ],
+            "low_stock_threshold": json_number(threshold),
+            "low_stock": [item.index for item in self.below(threshold)]
+        }
+
+
+@instrumentation.timed("reports.build")
+def build_report(data):
+    """Compute the stock report of a list of items.
+
+    Args:
+        data (list): The inventory items.
+
+    Returns:
+        QuantityReport: The report.
+    """
+    return QuantityReport(data)
+
+
+def format_number(value):
+    """Format a total the way quantities are shown, e.g. "5" or "2.5"."""
+    if value is None:
+        return "-"
+    if not math.isfinite(value):
+        return str(value)  # "inf", "-inf" or "nan"
+    return f"{value:,.10g}" if value != int(value) else f"{int(value):,}"
+
+
+def print_report(report, threshold=None):
+    """Print the stock report as tables.
+
+    Args:
+        report (QuantityReport): The report to print.
+        threshold (float, optional): The low stock threshold, by default
+            config.LOW_STOCK_THRESHOLD.
+
+    Returns:
+        None
+    """
+    if threshold is None:
+        threshold = config.LOW_STOCK_THRESHOLD
+    console = Console()
+    for field, title in (
+        ("type_unit", "Stock by type and unit"),
+        ("unit", "Stock by unit")
+    ):
+        table = Table(title=title)
+        if field == "type_unit":
+            table.add_column("Type", style="yellow")
+        table.add_column("Unit", style="yellow")
+        for column in ("Items", "Total", "Min", "Max"):
+            table.add_column(column, justify="right", style="yellow")
+        for group, stats in report.group_by(field).items():
+            labels = list(group) if field == "type_unit" else [group]
+            table.add_row(
+                *labels,
+                f"{stats.count:,}",
+                format_number(stats.total),
+                format_number(stats.minimum if stats.numeric else None),
+                format_number(stats.maximum if stats.numeric else None)
+            )
+        console.print(table)
+
+    low_stock = len(report.below(threshold))
+    console.print(
+        f"\n[blue]{len(report.items):,} items, "
+        f"{low_stock:,} at or below {format_number(threshold)}."
+    )
+    if report.unparsed:
+        console.print(
+            f"[yellow]{report.unparsed:,} items have a quantity that is "
+            "not a number and are only counted."
+        )
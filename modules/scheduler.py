@@ -0,0 +1,192 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+from modules import instrumentation
+
+
+class TokenBucket:
+    """Rate limiter allowing short bursts up to a fixed average rate.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): The most tokens that can be saved up.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available.
+
+        Returns:
+            float: The seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class _WriteQueue:
+    # Cell writes waiting for the request in flight to finish
+    def __init__(self):
+        self.pending = []
+        self.flushing = False
+
+
+class RequestScheduler:
+    """Send API requests within a quota, retrying when it is exceeded.
+
+    Every request waits for a token of a shared token bucket, so
+    sustained traffic settles at the quota instead of failing. Requests
+    rejected anyway (for example by other clients sharing the quota)
+    are retried with truncated exponential backoff and full jitter.
+    Cell writes can also be coalesced: writes queued while another
+    write to the same target is in flight are merged into one request.
+
+    Args:
+        requests_per_minute (int): The quota to stay within.
+        max_retries (int): Retries before a request gives up.
+        is_retryable (function): Tells whether an exception is worth
+            retrying, e.g. HTTP 429 or 503 responses.
+        backoff_base (float): Seconds to wait after the first failure.
+        backoff_max (float): The longest wait between two attempts.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute,
+        max_retries,
+        is_retryable,
+        backoff_base=1.0,
+        backoff_max=64.0
+    ):
+        # A burst of a sixth of the quota keeps any rolling minute
+        # close to the limit
+        self.bucket = TokenBucket(
+            requests_per_minute / 60,
+            max(1, requests_per_minute // 6)
+        )
+        self.max_retries = max_retries
+        self.is_retryable = is_retryable
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt):
+        """Return a random delay before retrying a failed attempt.
+
+        Args:
+            attempt (int): The number of failed attempts so far, from 0.
+
+        Returns:
+            float: Seconds to sleep, between 0 and the capped backoff.
+        """
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    def call(self, function, *args, is_retryable=None, **kwargs):
+        """Run a request within the quota, retrying transient failures.
+
+        Args:
+            function (function): The blocking call sending the request.
+            *args: Positional arguments for function.
+            is_retryable (function, optional): Replaces the scheduler's
+                own check for this request, e.g. for a request that is
+                not safe to send twice.
+            **kwargs: Keyword arguments for function.
+
+        Returns:
+            The result of function.
+
+        Raises:
+            Exception: The last error once retries are exhausted, or any
+            error that is not retryable.
+        """
+        is_retryable = is_retryable or self.is_retryable
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire()
+            if waited:
+                instrumentation.count("scheduler.throttled_seconds", waited)
+            try:
+                return function(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+            instrumentation.count("scheduler.retries")
+            time.sleep(self.backoff(attempt))
+            attempt += 1
+
+    def coalesce(self, key, cells, send):
+        """Write cells, merged with other writes queued for the same key.
+
+        The first caller sends its cells right away. Callers arriving
+        while that request is in flight are queued, and their cells are
+        sent together in the next request, the latest value winning
+        when a cell is written twice. Each caller returns once the
+        request carrying its cells has finished.
+
+        Args:
+            key: Identifies the write target, e.g. the worksheet.
+            cells (list): (row, col, value) tuples to write.
+            send (function): Writes a list of cells in one request.
+
+        Raises:
+            Exception: The error of the request carrying the cells.
+        """
+        future = Future()
+        with self._lock:
+            queue = self._queues.setdefault(key, _WriteQueue())
+            queue.pending.append((cells, future))
+            leader = not queue.flushing
+            queue.flushing = True
+
+        if leader:
+            self._flush(queue, send)
+        future.result()
+
+    def _flush(self, queue, send):
+        while True:
+            with self._lock:
+                batch = queue.pending
+                queue.pending = []
+                if not batch:
+                    queue.flushing = False
+                    return
+
+            if len(batch) > 1:
+                # Requests saved by merging the queued writes
+                instrumentation.count("scheduler.coalesced", len(batch) - 1)
+            merged = {}
+            for cells, _ in batch:
+                for row, col, value in cells:
+                    merged[(row, col)] = value
+            try:
+                self.call(send, [
+                    (row, col, value)
+                    for (row, col), value in merged.items()
+                ])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for _, future in batch:
+                    future.set_result(None)
@@ -0,0 +1,602 @@
+import bisect
+import heapq
+import re
+from collections import defaultdict
+from operator import itemgetter
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def get_trigrams(text):
+    """Split text into its set of overlapping three-character substrings.
+
+    Args:
+        text (str): The text to split, already lowercased.
+
+    Returns:
+        set: The trigrams found in the text.
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Inverted index from name trigrams to inventory items.
+
+    Items are keyed by identity, so the index stays valid when the
+    cached inventory shifts indices after a delete. It is kept up to
+    date through add, remove and update instead of being rebuilt.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(set)
+        self.names = {}
+        self.items = {}
+
+    def build(self, data):
+        """Index every item of a freshly loaded inventory.
+
+        Args:
+            data (list): The inventory items.
+
+        Returns:
+            None
+        """
+        self.postings.clear()
+        self.names.clear()
+        self.items.clear()
+        for item in data:
+            self.add(item)
+
+    def add(self, item):
+        """Add an item to the index.
+
+        Args:
+            item (dict): The item to index.
+
+        Returns:
+            None
+        """
+        key = id(item)
+        name = item["name"].lower()
+        self.names[key] = name
+        self.items[key] = item
+        for trigram in get_trigrams(name):
+            self.postings[trigram].add(key)
+
+    def remove(self, item):
+        """Remove an item from the index.
+
+        Args:
+            item (dict): The item to remove.
+
+        Returns:
+            None
+        """
+        key = id(item)
+        name = self.names.pop(key, None)
+        if name is None:
+            return
+        del self.items[key]
+        for trigram in get_trigrams(name):
+            posting = self.postings[trigram]
+            posting.discard(key)
+            if not posting:
+                del self.postings[trigram]
+
+    def update(self, item):
+        """Re-index an item whose name may have changed.
+
+        Args:
+            item (dict): The item, already holding its new values.
+
+        Returns:
+            None
+        """
+        if self.names.get(id(item)) != item["name"].lower():
+            self.remove(item)
+            self.add(item)
+
+    def estimate(self, query):
+        """Return an upper bound of the matches of search, cheaply.
+
+        Args:
+            query (str): The text to search for.
+
+        Returns:
+            int: The size of the smallest postings list of the query.
+        """
+        trigrams = get_trigrams(query.lower())
+        if not trigrams:
+            return len(self.names)
+        return min(len(self.postings.get(trigram, ())) for trigram in trigrams)
+
+    def search(self, query):
+        """Find the items whose name contains the query, ignoring case.
+
+        Results are the same, in the same order, as a linear scan with
+        `query.lower() in item["name"].lower()`.
+
+        Args:
+            query (str): The text to search for.
+
+        Returns:
+            list: The matching items, ordered by index.
+        """
+        query = query.lower()
+        trigrams = get_trigrams(query)
+
+        if trigrams:
+            # Intersect the postings lists, smallest first
+            postings = sorted(
+                (self.postings.get(trigram, set()) for trigram in trigrams),
+                key=len
+            )
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                if not candidates:
+                    break
+                candidates &= posting
+        else:
+            # Queries shorter than a trigram are checked against every name
+            candidates = self.names.keys()
+
+        # Trigrams only narrow the candidates; confirm the full substring
+        results = [
+            self.items[key]
+            for key in candidates
+            if query in self.names[key]
+        ]
+        results.sort(key=lambda item: item["index"])
+        return results
+
+
+def get_words(text):
+    """Split text into lowercase words.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        list: The words, in order.
+    """
+    return WORD_PATTERN.findall(text.lower())
+
+
+def get_word_trigrams(word):
+    """Return the trigrams of a word padded with spaces.
+
+    The padding gives words shorter than three characters trigrams too,
+    and gives matching word starts and ends more weight.
+
+    Args:
+        word (str): A lowercase word.
+
+    Returns:
+        set: The trigrams of the padded word.
+    """
+    return get_trigrams(f"  {word} ")
+
+
+class FuzzyIndex:
+    """Ranked, typo-tolerant search over item names and types.
+
+    Items are indexed by the words of their name and type. The distinct
+    words also get a trigram index, so a query word is only compared
+    with vocabulary words sharing a trigram with it, instead of with
+    every item. Similar words are found by trigram (Jaccard) similarity
+    and items are ranked by how well their words match the query words.
+    Like TrigramIndex, items are keyed by identity and the index is
+    updated in place.
+
+    Args:
+        min_similarity (float): The least similarity, from 0 to 1, for a
+            word to match a query word.
+        type_weight (float): How much a match on the type counts
+            compared with a match on the name.
+    """
+
+    def __init__(self, min_similarity=0.3, type_weight=0.8):
+        self.min_similarity = min_similarity
+        self.type_weight = type_weight
+        self.items = {}
+        self.item_words = {}
+        self.name_words = defaultdict(set)
+        self.type_words = defaultdict(set)
+        self.word_postings = defaultdict(set)
+        self.word_trigram_counts = {}
+
+    def build(self, data):
+        """Index every item of a freshly loaded inventory.
+
+        Args:
+            data (list): The inventory items.
+
+        Returns:
+            None
+        """
+        self.items.clear()
+        self.item_words.clear()
+        self.name_words.clear()
+        self.type_words.clear()
+        self.word_postings.clear()
+        self.word_trigram_counts.clear()
+        for item in data:
+            self.add(item)
+
+    def _add_word(self, word):
+        if word.isdigit():
+            # Numbers only match exactly, so they need no trigrams
+            self.word_trigram_counts[word] = 0
+            return
+        trigrams = get_word_trigrams(word)
+        self.word_trigram_counts[word] = len(trigrams)
+        for trigram in trigrams:
+            self.word_postings[trigram].add(word)
+
+    def _remove_word(self, word):
+        # Only once no item uses the word any more
+        if word in self.name_words or word in self.type_words:
+            return
+        if not self.word_trigram_counts.pop(word):
+            return
+        for trigram in get_word_trigrams(word):
+            posting = self.word_postings[trigram]
+            posting.discard(word)
+            if not posting:
+                del self.word_postings[trigram]
+
+    def add(self, item):
+        """Add an item to the index.
+
+        Args:
+            item (dict): The item to index.
+
+        Returns:
+            None
+        """
+        key = id(item)
+        name_words = set(get_words(item["name"]))
+        type_words = set(get_words(item["type"]))
+        self.items[key] = item
+        self.item_words[key] = (name_words, type_words)
+        for words, postings in (
+            (name_words, self.name_words),
+            (type_words, self.type_words)
+        ):
+            for word in words:
+                if word not in self.word_trigram_counts:
+                    self._add_word(word)
+                postings[word].add(key)
+
+    def remove(self, item):
+        """Remove an item from the index.
+
+        Args:
+            item (dict): The item to remove.
+
+        Returns:
+            None
+        """
+        key = id(item)
+        words = self.item_words.pop(key, None)
+        if words is None:
+            return
+        del self.items[key]
+        for item_words, postings in zip(
+            words,
+            (self.name_words, self.type_words)
+        ):
+            for word in item_words:
+                posting = postings[word]
+                posting.discard(key)
+                if not posting:
+                    del postings[word]
+                    self._remove_word(word)
+
+    def update(self, item):
+        """Re-index an item whose name or type may have changed.
+
+        Args:
+            item (dict): The item, already holding its new values.
+
+        Returns:
+            None
+        """
+        words = (set(get_words(item["name"])), set(get_words(item["type"])))
+        if self.item_words.get(id(item)) != words:
+            self.remove(item)
+            self.add(item)
+
+    def similar_words(self, word):
+        """Find the indexed words similar to a word.
+
+        Args:
+            word (str): A lowercase query word.
+
+        Returns:
+            dict: Each similar word and its similarity, from 0 to 1.
+        """
+        if word.isdigit():
+            return {word: 1.0} if word in self.word_trigram_counts else {}
+        trigrams = get_word_trigrams(word)
+        shared = defaultdict(int)
+        for trigram in trigrams:
+            for candidate in self.word_postings.get(trigram, ()):
+                shared[candidate] += 1
+
+        similar = {}
+        for candidate, count in shared.items():
+            union = len(trigrams) + self.word_trigram_counts[candidate]
+            similarity = count / (union - count)
+            if similarity >= self.min_similarity:
+                similar[candidate] = similarity
+        return similar
+
+    def search(self, query, limit=20, where=None):
+        """Find the items best matching the query, allowing typos.
+
+        Every query word is matched with the most similar word of an
+        item's name, or of its type at type_weight. An item's score is
+        the average over the query words, so items matching more of the
+        query rank higher. Ties keep the inventory order.
+
+        Args:
+            query (str): The words to search for.
+            limit (int): The most results to return.
+            where (function, optional): Only rank the items for which it
+                returns True.
+
+        Returns:
+            list: (score, item) pairs, best match first.
+        """
+        query_words = get_words(query)
+        if not query_words:
+            return []
+
+        scores = defaultdict(float)
+        for query_word in query_words:
+            best = {}
+            for word, similarity in self.similar_words(query_word).items():
+                for postings, weight in (
+                    (self.name_words, 1.0),
+                    (self.type_words, self.type_weight)
+                ):
+                    score = similarity * weight
+                    for key in postings.get(word, ()):
+                        if score > best.get(key, 0.0):
+                            best[key] = score
+            for key, score in best.items():
+                scores[key] += score / len(query_words)
+
+        if where is not None:
+            scores = {
+                key: score
+                for key, score in scores.items()
+                if where(self.items[key])
+            }
+
+        top = heapq.nlargest(
+            limit,
+            scores.items(),
+            key=lambda entry: (entry[1], -self.items[entry[0]]["index"])
+        )
+        return [(score, self.items[key]) for key, score in top]
+
+
+class HashIndex:
+    """Exact-value index over one text field, ignoring case.
+
+    Fields like type and unit have few distinct values, so the index
+    maps every lowercase value to the set of items holding it. Items
+    hash by identity, so these sets can be intersected directly.
+
+    Args:
+        field (str): The indexed item field, e.g. "type".
+    """
+
+    def __init__(self, field):
+        self.field = field
+        self.postings = defaultdict(set)
+        self.values = {}
+
+    def build(self, data):
+        """Index every item of a freshly loaded inventory.
+
+        Args:
+            data (list): The inventory items.
+
+        Returns:
+            None
+        """
+        self.postings.clear()
+        self.values.clear()
+        for item in data:
+            self.add(item)
+
+    def add(self, item):
+        """Add an item to the index.
+
+        Args:
+            item (dict): The item to index.
+
+        Returns:
+            None
+        """
+        value = item[self.field].lower()
+        self.values[id(item)] = value
+        self.postings[value].add(item)
+
+    def remove(self, item):
+        """Remove an item from the index.
+
+        Args:
+            item (dict): The item to remove.
+
+        Returns:
+            None
+        """
+        value = self.values.pop(id(item), None)
+        if value is None:
+            return
+        posting = self.postings[value]
+        posting.discard(item)
+        if not posting:
+            del self.postings[value]
+
+    def update(self, item):
+        """Re-index an item whose field may have changed.
+
+        Args:
+            item (dict): The item, already holding its new values.
+
+        Returns:
+            None
+        """
+        if self.values.get(id(item)) != item[self.field].lower():
+            self.remove(item)
+            self.add(item)
+
+    def matching_values(self, predicate):
+        """Return the indexed values for which predicate is true.
+
+        Args:
+            predicate (function): Called with each lowercase value.
+
+        Returns:
+            list: The matching values.
+        """
+        return [value for value in self.postings if predicate(value)]
+
+    def count(self, values):
+        """Return how many items hold one of the values."""
+        return sum(len(self.postings.get(value, ())) for value in values)
+
+    def lookup(self, values):
+        """Return the set of items holding one of the values.
+
+        The set may belong to the index and must not be modified.
+        """
+        if len(values) == 1:
+            return self.postings.get(values[0], set())
+        return set().union(*(self.postings.get(value, ()) for value in values))
+
+
+class SortedIndex:
+    """Index of a numeric field kept in sorted order, for range queries.
+
+    The values and items are stored in two parallel lists sorted by
+    value, so a range is found with two bisections and read as a slice.
+    Items whose field is not a number are left out.
+
+    Args:
+        field (str): The indexed item attribute, e.g. "quantity".
+    """
+
+    def __init__(self, field):
+        self.field = field
+        self.sorted_values = []
+        self.sorted_items = []
+        self.values = {}
+
+    def _value(self, item):
+        value = getattr(item, self.field)
+        if value.__class__ is not float or value != value:
+            return None  # Not a number, or NaN
+        return value
+
+    def build(self, data):
+        """Index every item of a freshly loaded inventory.
+
+        Args:
+            data (list): The inventory items.
+
+        Returns:
+            None
+        """
+        self.values.clear()
+        entries = []
+        for item in data:
+            value = self._value(item)
+            if value is not None:
+                self.values[id(item)] = value
+                entries.append((value, item.index, item))
+        entries.sort(key=itemgetter(0, 1))
+        self.sorted_values = [entry[0] for entry in entries]
+        self.sorted_items = [entry[2] for entry in entries]
+
+    def add(self, item):
+        """Add an item to the index.
+
+        Args:
+            item (dict): The item to index.
+
+        Returns:
+            None
+        """
+        value = self._value(item)
+        if value is None:
+            return
+        self.values[id(item)] = value
+        position = bisect.bisect_right(self.sorted_values, value)
+        self.sorted_values.insert(position, value)
+        self.sorted_items.insert(position, item)
+
+    def remove(self, item):
+        """Remove an item from the index.
+
+        Args:
+            item (dict): The item to remove.
+
+        Returns:
+            None
+        """
+        value = self.values.pop(id(item), None)
+        if value is None:
+            return
+        start = bisect.bisect_left(self.sorted_values, value)
+        end = bisect.bisect_right(self.sorted_values, value)
+        # Items compare by identity
+        position = self.sorted_items.index(item, start, end)
+        del self.sorted_values[position]
+        del self.sorted_items[position]
+
+    def update(self, item):
+        """Re-index an item whose field may have changed.
+
+        Args:
+            item (dict): The item, already holding its new values.
+
+        Returns:
+            None
+        """
+        if self.values.get(id(item)) != self._value(item):
+            self.remove(item)
+            self.add(item)
+
+    def bounds(self, low=None, high=None, include_low=True,
+               include_high=True):
+        """Return the slice of the sorted lists holding a value range.
+
+        Args:
+            low (float, optional): The lower bound, None for no bound.
+            high (float, optional): The upper bound, None for no bound.
+            include_low (bool): Whether low itself is in the range.
+            include_high (bool): Whether high itself is in the range.
+
+        Returns:
+            tuple: The start and end positions; end - start items match.
+        """
+        values = self.sorted_values
+        start = 0
+        end = len(values)
+        if low is not None:
+            find = bisect.bisect_left if include_low else bisect.bisect_right
+            start = find(values, low)
+        if high is not None:
+            find = bisect.bisect_right if include_high else bisect.bisect_left
+            end = find(values, high)
+        return start, max(start, end)
+
+    def lookup(self, start, end):
+        """Return the items of a slice returned by bounds."""
+        return self.sorted_items[start:end]
@@ -0,0 +1,74 @@
+import marshal
+import os
+from modules import config, instrumentation
+
+# Bumped whenever the layout below changes; older files are ignored
+FORMAT_VERSION = 1
+
+
+def get_source():
+    """Identify the inventory a snapshot file belongs to.
+
+    A snapshot of another backend, spreadsheet or set of worksheets is
+    never shown, even for a moment.
+
+    Returns:
+        list: The backend, its location and the shard names.
+    """
+    if config.BACKEND == "sqlite":
+        location = os.path.abspath(config.DB_PATH)
+    else:
+        location = config.SPREADSHEET_NAME
+    return [config.BACKEND, location, list(config.SHARDS)]
+
+
+@instrumentation.timed("snapshot_file.save")
+def save(path, shards):
+    """Write the inventory to a snapshot file, replacing it atomically.
+
+    The items are stored column by column with marshal, quantities
+    already parsed, so loading is a single marshal.load with no text to
+    parse. A crash while saving leaves the previous file in place.
+
+    Args:
+        path (str): The snapshot file.
+        shards (dict): Columns by shard name, as returned by load.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(marshal.dumps({
+            "format": FORMAT_VERSION,
+            "source": get_source(),
+            "shards": shards
+        }))
+    os.replace(temporary_path, path)
+
+
+@instrumentation.timed("snapshot_file.load")
+def load(path):
+    """Read a snapshot file written by save.
+
+    Args:
+        path (str): The snapshot file.
+
+    Returns:
+        dict or None: For every shard, the names, types, quantities,
+        units, IDs and revisions lists; None if there is no usable
+        snapshot for the configured inventory.
+    """
+    try:
+        # One read; marshal.load reads a file object in small pieces
+        with open(path, "rb") as file:
+            snapshot = marshal.loads(file.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if (
+        not isinstance(snapshot, dict)
+        or snapshot.get("format") != FORMAT_VERSION
+        or snapshot.get("source") != get_source()
+    ):
+        return None
+    return snapshot["shards"]
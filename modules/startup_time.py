@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+
+# The project root, where run.py lives
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import_times(module="run"):
+    """Measure how long each module takes to import on a cold start.
+
+    The import runs in a fresh interpreter with `-X importtime`, so
+    nothing already loaded in this process skews the numbers.
+
+    Args:
+        module (str): The module to import, the application by default.
+
+    Returns:
+        list: Dictionaries with the module name and its "self_ms" and
+        "cumulative_ms" import times, slowest cumulative time first.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    timings = []
+    for line in result.stderr.splitlines():
+        # Format: "import time: <self us> | <cumulative us> | <module>"
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line
+        timings.append({
+            "module": fields[2].strip(),
+            "self_ms": int(fields[0]) / 1000,
+            "cumulative_ms": int(fields[1]) / 1000
+        })
+
+    timings.sort(key=lambda timing: timing["cumulative_ms"], reverse=True)
+    return timings
@@ -0,0 +1,790 @@
+import functools
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from modules import config, instrumentation
+from modules.helpers import coalesce_rows
+from modules.scheduler import RequestScheduler
+
+
+# Column headers shared by every backend, in sheet order.
+# The revision column holds a token that changes on every write to the
+# row, which lets delta sync find changed rows without reading them.
+# The ID column holds a permanent identifier given to the item when it
+# is created, which stays valid when rows above it are deleted.
+HEADERS = ["Name", "Type", "Quantity", "Unit", "Revision", "ID"]
+REVISION_COLUMN = HEADERS.index("Revision") + 1
+ID_COLUMN = HEADERS.index("ID") + 1
+# Item fields in sheet column order
+FIELDS = [header.lower() for header in HEADERS[:REVISION_COLUMN - 1]]
+
+# Responses worth retrying: quota exceeded and temporary server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# A server error may come after the request was applied, so requests
+# that are not safe to repeat (appends, deletes) only retry these,
+# which are rejected before anything changes
+QUOTA_STATUS_CODES = {429}
+
+# find_rows checks the rows items were last seen at in one request, but
+# every range is sent in the URL; beyond this many ranges it reads the
+# whole ID column instead
+MAX_HINT_RANGES = 100
+
+SCOPE = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive.file",
+    "https://www.googleapis.com/auth/drive"
+]
+
+
+class StorageError(Exception):
+    """Raised when a storage backend fails to read or write inventory data."""
+
+
+def column_name(col):
+    """Return the A1 name of a column, e.g. 3 -> "C".
+
+    Only single-letter columns are needed for the inventory layout.
+    """
+    return chr(ord("A") + col - 1)
+
+
+def cell_name(row, col):
+    """Return the A1 name of a cell, e.g. (2, 3) -> "C2"."""
+    return f"{column_name(col)}{row}"
+
+
+# Cells are written as USER_ENTERED, so Sheets would turn a token of
+# digits, or one shaped like "123e45", into a number; the letter prefix
+# keeps every token text
+def new_revision():
+    """Return a fresh revision token for a written row."""
+    return f"r{uuid.uuid4().hex[:12]}"
+
+
+def new_item_id():
+    """Return a new permanent identifier for an item."""
+    return f"i{uuid.uuid4().hex[:12]}"
+
+
+class StorageBackend:
+    """Interface implemented by every inventory storage backend.
+
+    Rows are addressed the same way as in the Google Sheets worksheet:
+    row 1 holds the headers and items start at row 2.
+    """
+
+    def connect(self):
+        """Open the connection ahead of the first operation.
+
+        Backends without a remote connection have nothing to do here.
+        """
+
+    def get_all_values(self):
+        """Return all rows, headers first, as lists of strings."""
+        raise NotImplementedError
+
+    def get_revisions(self):
+        """Return the revision token of every item row, in row order.
+
+        Rows without a revision, e.g. rows added by hand, give "".
+        """
+        raise NotImplementedError
+
+    def get_ids(self):
+        """Return the item ID of every item row, in row order."""
+        raise NotImplementedError
+
+    def get_rows(self, ranges):
+        """Read selected rows in one request.
+
+        Args:
+            ranges (list): (first_row, last_row) pairs, both inclusive.
+
+        Returns:
+            list: For each range, its rows as lists of strings.
+        """
+        raise NotImplementedError
+
+    def iter_rows(self, chunk_size):
+        """Yield item rows in order, reading chunk_size rows per request.
+
+        Only one chunk is held in memory at a time.
+        """
+        first = 2  # Skip the header row
+        while True:
+            rows = self.get_rows([(first, first + chunk_size - 1)])[0]
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            first += chunk_size
+
+    def append_row(self, values):
+        """Append a new item row at the end of the inventory."""
+        raise NotImplementedError
+
+    def append_rows(self, rows):
+        """Append many item rows in a single request."""
+        raise NotImplementedError
+
+    def delete_row(self, row):
+        """Delete the item stored at the given row number."""
+        raise NotImplementedError
+
+    def delete_rows(self, ranges):
+        """Delete several ranges of rows in a single request.
+
+        Args:
+            ranges (list): (first_row, last_row) pairs, both inclusive and
+                not overlapping, numbered as before any is deleted.
+        """
+        raise NotImplementedError
+
+    def update_cell(self, row, col, value):
+        """Set a single cell; columns are 1-based like in the sheet."""
+        raise NotImplementedError
+
+    def update_cells(self, cells):
+        """Set many cells in a single request.
+
+        Args:
+            cells (list): (row, col, value) tuples to write.
+        """
+        raise NotImplementedError
+
+    def find_rows(self, item_ids, hints=None):
+        """Find the current rows of items, which move as rows are deleted.
+
+        The rows the items were last seen at are checked first, in one
+        request; the whole ID column is only read for items that moved.
+
+        Args:
+            item_ids (list): The IDs of the items.
+            hints (dict, optional): item ID -> the row it was last at.
+
+        Returns:
+            dict: item ID -> row, for the items that still exist.
+        """
+        hints = {
+            item_id: hints[item_id]
+            for item_id in item_ids
+            if hints and hints.get(item_id)
+        }
+        rows = {}
+        ranges = coalesce_rows(hints.values())
+        if ranges and len(ranges) <= MAX_HINT_RANGES:
+            found = {}
+            for (first, _), values in zip(ranges, self.get_rows(ranges)):
+                for row, values in enumerate(values, start=first):
+                    found[row] = values[ID_COLUMN - 1]
+            rows = {
+                item_id: row
+                for item_id, row in hints.items()
+                if found.get(row) == item_id
+            }
+        if len(rows) < len(item_ids):
+            positions = {
+                item_id: row
+                for row, item_id in enumerate(self.get_ids(), start=2)
+                if item_id
+            }
+            for item_id in item_ids:
+                if item_id not in rows and item_id in positions:
+                    rows[item_id] = positions[item_id]
+        return rows
+
+    def update_items(self, cells, hints=None):
+        """Set cells of items found by ID, in a single write request.
+
+        Args:
+            cells (list): (item ID, col, value) tuples to write.
+            hints (dict, optional): item ID -> the row it was last at,
+                see find_rows.
+
+        Returns:
+            set: The IDs of the items that were found and written.
+        """
+        rows = self.find_rows(
+            list(dict.fromkeys(item_id for item_id, _, _ in cells)),
+            hints
+        )
+        found_cells = [
+            (rows[item_id], col, value)
+            for item_id, col, value in cells
+            if item_id in rows
+        ]
+        if found_cells:
+            self.update_cells(found_cells)
+        return set(rows)
+
+    def delete_items(self, item_ids, hints=None):
+        """Delete items found by ID, in a single write request.
+
+        Args:
+            item_ids (list): The IDs of the items to delete.
+            hints (dict, optional): item ID -> the row it was last at,
+                see find_rows.
+
+        Returns:
+            set: The IDs of the items that were found and deleted.
+        """
+        rows = self.find_rows(item_ids, hints)
+        if rows:
+            # Contiguous rows are deleted as one range, bottom up
+            self.delete_rows(coalesce_rows(rows.values()))
+        return set(rows)
+
+
+def is_retryable(error):
+    """Tell whether a failed Google Sheets request should be retried.
+
+    Args:
+        error (Exception): The error raised by gspread.
+
+    Returns:
+        bool: True for quota and temporary server errors.
+    """
+    return _status_code(error) in RETRY_STATUS_CODES
+
+
+def is_quota_error(error):
+    """Tell whether a request that is not safe to repeat can be retried.
+
+    Args:
+        error (Exception): The error raised by gspread.
+
+    Returns:
+        bool: True only when the request was rejected by the quota.
+    """
+    return _status_code(error) in QUOTA_STATUS_CODES
+
+
+def _status_code(error):
+    from gspread.exceptions import APIError
+
+    if not isinstance(error, APIError):
+        return None
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+# Every worksheet shares the quota of the service account
+sheets_scheduler = RequestScheduler(
+    config.SHEETS_REQUESTS_PER_MINUTE,
+    config.SHEETS_MAX_RETRIES,
+    is_retryable
+)
+
+_sheets_clients = {}
+_sheets_clients_lock = threading.Lock()
+
+
+def get_sheets_client(creds_file):
+    """Return the authorized gspread client for a credentials file.
+
+    One client, and so one HTTP session, is shared by every worksheet.
+
+    Args:
+        creds_file (str): Path to the service account credentials.
+
+    Returns:
+        gspread.Client: The shared client.
+    """
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    with _sheets_clients_lock:
+        if creds_file not in _sheets_clients:
+            creds = Credentials.from_service_account_file(creds_file)
+            scoped_creds = creds.with_scopes(SCOPE)
+            _sheets_clients[creds_file] = gspread.authorize(scoped_creds)
+        return _sheets_clients[creds_file]
+
+
+class SheetsBackend(StorageBackend):
+    """Store the inventory in a Google Sheets worksheet.
+
+    Nothing is sent over the network until the first operation (or an
+    explicit connect call). The client and worksheet handle are then
+    cached and reused by every following operation.
+    gspread and google-auth are imported on that first operation too,
+    since they are slow to import and not needed by the menus.
+    Requests go through sheets_scheduler, which keeps them within the
+    API quota and retries them when the quota is exceeded.
+    """
+
+    def __init__(self, creds_file, spreadsheet_name, worksheet_name):
+        self.creds_file = creds_file
+        self.spreadsheet_name = spreadsheet_name
+        self.worksheet_name = worksheet_name
+        self._worksheet_handle = None
+        self._connect_lock = threading.Lock()
+
+    def connect(self):
+        self._worksheet()
+
+    def _worksheet(self):
+        with self._connect_lock:
+            if self._worksheet_handle is None:
+                self._open_worksheet()
+            return self._worksheet_handle
+
+    def _open_worksheet(self):
+        with self._sheets_errors():
+            client = get_sheets_client(self.creds_file)
+            sheet = sheets_scheduler.call(client.open, self.spreadsheet_name)
+            self._worksheet_handle = sheets_scheduler.call(
+                sheet.worksheet,
+                self.worksheet_name
+            )
+
+    @contextmanager
+    def _sheets_errors(self):
+        from google.auth.exceptions import GoogleAuthError
+        from gspread.exceptions import (
+            APIError,
+            SpreadsheetNotFound,
+            WorksheetNotFound
+        )
+
+        try:
+            yield
+        except (
+            OSError,
+            APIError,
+            GoogleAuthError,
+            SpreadsheetNotFound,
+            WorksheetNotFound
+        ) as e:
+            # Reopen the worksheet on the next call in case it was replaced
+            self._worksheet_handle = None
+            raise StorageError(str(e)) from e
+
+    def get_all_values(self):
+        worksheet = self._worksheet()
+        with self._sheets_errors():
+            return sheets_scheduler.call(worksheet.get_all_values)
+
+    def get_revisions(self):
+        worksheet = self._worksheet()
+        with self._sheets_errors():
+            # Trailing empty cells are not returned, so read the name
+            # column, which every row fills, to count the rows too
+            names, revisions = sheets_scheduler.call(worksheet.batch_get, [
+                f"{cell_name(2, col)}:{column_name(col)}"
+                for col in (1, REVISION_COLUMN)
+            ])
+        revisions = [row[0] if row else "" for row in revisions]
+        return revisions + [""] * (len(names) - len(revisions))
+
+    def get_ids(self):
+        worksheet = self._worksheet()
+        with self._sheets_errors():
+            return sheets_scheduler.call(
+                worksheet.col_values,
+                ID_COLUMN
+            )[1:]
+
+    def get_rows(self, ranges):
+        worksheet = self._worksheet()
+        with self._sheets_errors():
+            value_ranges = sheets_scheduler.call(worksheet.batch_get, [
+                f"{cell_name(first, 1)}:{cell_name(last, len(HEADERS))}"
+                for first, last in ranges
+            ])
+        # Trailing empty cells are not returned, so pad every row
+        return [
+            [row + [""] * (len(HEADERS) - len(row)) for row in value_range]
+            for value_range in value_ranges
+        ]
+
+    def append_row(self, values):
+        worksheet = self._worksheet()
+        with self._sheets_errors():
+            sheets_scheduler.call(
+                worksheet.append_row,
+                list(values),
+                is_retryable=is_quota_error
+            )
+
+    def append_rows(self, rows):
+        worksheet = self._worksheet()
+        with self._sheets_errors():
+            sheets_scheduler.call(
+                worksheet.append_rows,
+                [list(values) for values in rows],
+                is_retryable=is_quota_error
+            )
+
+    def delete_row(self, row):
+        worksheet = self._worksheet()
+        with self._sheets_errors():
+            sheets_scheduler.call(
+                worksheet.delete_rows,
+                row,
+                is_retryable=is_quota_error
+            )
+
+    def delete_rows(self, ranges):
+        worksheet = self._worksheet()
+        # One spreadsheets:batchUpdate; its requests run in order, so
+        # deleting from the bottom up keeps the other row numbers valid
+        requests = [
+            {
+                "deleteDimension": {
+                    "range": {
+                        "sheetId": worksheet.id,
+                        "dimension": "ROWS",
+                        "startIndex": first - 1,
+                        "endIndex": last
+                    }
+                }
+            }
+            for first, last in sorted(ranges, reverse=True)
+        ]
+        with self._sheets_errors():
+            sheets_scheduler.call(
+                worksheet.client.batch_update,
+                worksheet.spreadsheet_id,
+                {"requests": requests},
+                is_retryable=is_quota_error
+            )
+
+    def update_cell(self, row, col, value):
+        self.update_cells([(row, col, value)])
+
+    def update_cells(self, cells):
+        worksheet = self._worksheet()
+        with self._sheets_errors():
+            # Writes from other threads queued meanwhile share a request
+            sheets_scheduler.coalesce(
+                self,
+                cells,
+                lambda cells: self._send_cells(worksheet, cells)
+            )
+
+    def _send_cells(self, worksheet, cells):
+        # One values:batchUpdate request covering every changed cell.
+        # Cells that follow each other down a column, e.g. the IDs a
+        # full load fills in, are sent as one range such as "F2:F900".
+        # A cell written twice keeps the last value.
+        values = {(row, col): value for row, col, value in cells}
+        runs = []
+        for row, col in sorted(values, key=lambda cell: (cell[1], cell[0])):
+            run = runs[-1] if runs else None
+            if run and run[1] == col and run[2] == row - 1:
+                run[2] = row
+                run[3].append([values[row, col]])
+            else:
+                runs.append([row, col, row, [[values[row, col]]]])
+        data = [
+            {
+                "range": (
+                    cell_name(first, col)
+                    if first == last
+                    else f"{cell_name(first, col)}:{cell_name(last, col)}"
+                ),
+                "values": run_values
+            }
+            for first, col, last, run_values in runs
+        ]
+        # USER_ENTERED matches how gspread's update_cell writes values
+        worksheet.batch_update(data, value_input_option="USER_ENTERED")
+
+
+class SQLiteBackend(StorageBackend):
+    """Store the inventory in a local SQLite database.
+
+    Items keep their insertion order through the autoincrement id, which
+    maps them onto the same row numbers the worksheet would use.
+    The connection is shared between threads, one operation at a time.
+    Each inventory shard is stored in its own table.
+    """
+
+    # Table columns for the sheet columns, in HEADERS order.
+    # The item ID is not the table's own id, which only orders the rows.
+    COLUMNS = ["name", "type", "quantity", "unit", "revision", "item_id"]
+
+    def __init__(self, path, table="inventory"):
+        # The table name is put into SQL, so only allow plain identifiers
+        if not table.replace("_", "").isalnum() or not table.isascii():
+            raise StorageError(f"Invalid inventory table name '{table}'.")
+        self.table = table
+        self._lock = threading.RLock()
+        with self._database():
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    quantity TEXT NOT NULL,
+                    unit TEXT NOT NULL,
+                    revision TEXT NOT NULL DEFAULT '',
+                    item_id TEXT NOT NULL DEFAULT ''
+                );
+                CREATE INDEX IF NOT EXISTS idx_{table}_name
+                    ON {table} (name COLLATE NOCASE);
+                CREATE INDEX IF NOT EXISTS idx_{table}_type
+                    ON {table} (type);
+            """)
+            columns = [
+                column[1]
+                for column in self.conn.execute(
+                    f"PRAGMA table_info({table})"
+                )
+            ]
+            # Databases created before revisions or IDs were tracked
+            for column in ("revision", "item_id"):
+                if column not in columns:
+                    self.conn.execute(
+                        f"ALTER TABLE {table} "
+                        f"ADD COLUMN {column} TEXT NOT NULL DEFAULT ''"
+                    )
+            self.conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_item_id "
+                f"ON {table} (item_id)"
+            )
+
+    @contextmanager
+    def _database(self):
+        with self._lock:
+            try:
+                yield
+            except sqlite3.Error as e:
+                raise StorageError(str(e)) from e
+
+    def _row_id(self, row):
+        # Row 2 is the first item, so skip the header row in the offset
+        cursor = self.conn.execute(
+            f"SELECT id FROM {self.table} ORDER BY id LIMIT 1 OFFSET ?",
+            (row - 2,)
+        )
+        found = cursor.fetchone()
+        if found is None:
+            raise StorageError(f"Row {row} does not exist.")
+        return found[0]
+
+    def get_all_values(self):
+        with self._database():
+            cursor = self.conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} "
+                f"FROM {self.table} ORDER BY id"
+            )
+            return [list(HEADERS)] + [list(row) for row in cursor]
+
+    def get_revisions(self):
+        with self._database():
+            cursor = self.conn.execute(
+                f"SELECT revision FROM {self.table} ORDER BY id"
+            )
+            return [row[0] for row in cursor]
+
+    def get_ids(self):
+        with self._database():
+            cursor = self.conn.execute(
+                f"SELECT item_id FROM {self.table} ORDER BY id"
+            )
+            return [row[0] for row in cursor]
+
+    def get_rows(self, ranges):
+        with self._database():
+            return [
+                [
+                    list(row)
+                    for row in self.conn.execute(
+                        f"SELECT {', '.join(self.COLUMNS)} "
+                        f"FROM {self.table} ORDER BY id LIMIT ? OFFSET ?",
+                        (last - first + 1, first - 2)
+                    )
+                ]
+                for first, last in ranges
+            ]
+
+    def iter_rows(self, chunk_size):
+        # Page by id so the lock is only held while a chunk is read
+        last_id = 0
+        while True:
+            with self._database():
+                rows = self.conn.execute(
+                    f"SELECT id, {', '.join(self.COLUMNS)} "
+                    f"FROM {self.table} WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            for row in rows:
+                yield list(row[1:])
+
+    def append_row(self, values):
+        self.append_rows([values])
+
+    def append_rows(self, rows):
+        padding = [""] * len(HEADERS)
+        with self._database(), self.conn:
+            self.conn.executemany(
+                f"INSERT INTO {self.table} ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                (
+                    [str(value) for value in
+                     (list(values) + padding)[:len(HEADERS)]]
+                    for values in rows
+                )
+            )
+
+    def delete_row(self, row):
+        with self._database(), self.conn:
+            self.conn.execute(
+                f"DELETE FROM {self.table} WHERE id = ?",
+                (self._row_id(row),)
+            )
+
+    def delete_rows(self, ranges):
+        # All ranges in one transaction, from the bottom up
+        with self._database(), self.conn:
+            for first, last in sorted(ranges, reverse=True):
+                cursor = self.conn.execute(
+                    f"DELETE FROM {self.table} WHERE id IN ("
+                    f"SELECT id FROM {self.table} "
+                    "ORDER BY id LIMIT ? OFFSET ?)",
+                    (last - first + 1, first - 2)
+                )
+                if cursor.rowcount != last - first + 1:
+                    raise StorageError(f"Rows {first}-{last} do not exist.")
+
+    def update_cell(self, row, col, value):
+        self.update_cells([(row, col, value)])
+
+    def update_cells(self, cells):
+        # All cells are written in one transaction, and each row is
+        # looked up once however many of its cells change
+        with self._database(), self.conn:
+            row_ids = {}
+            for row, col, value in cells:
+                if row not in row_ids:
+                    row_ids[row] = self._row_id(row)
+                # Column names come from COLUMNS, never from user input
+                column = self.COLUMNS[col - 1]
+                self.conn.execute(
+                    f"UPDATE {self.table} SET {column} = ? WHERE id = ?",
+                    (str(value), row_ids[row])
+                )
+
+    def update_items(self, cells, hints=None):
+        # Items are found through the item_id index rather than by row
+        # number, which the table can only count to; hints are not needed
+        changes = {}
+        for item_id, col, value in cells:
+            # Column names come from COLUMNS, never from user input
+            changes.setdefault(item_id, {})[self.COLUMNS[col - 1]] = value
+        found = set()
+        with self._database(), self.conn:
+            for item_id, values in changes.items():
+                assignments = ", ".join(f"{column} = ?" for column in values)
+                cursor = self.conn.execute(
+                    f"UPDATE {self.table} SET {assignments} "
+                    "WHERE item_id = ?",
+                    [str(value) for value in values.values()] + [item_id]
+                )
+                if cursor.rowcount:
+                    found.add(item_id)
+        return found
+
+    def delete_items(self, item_ids, hints=None):
+        found = set()
+        with self._database(), self.conn:
+            for item_id in item_ids:
+                cursor = self.conn.execute(
+                    f"DELETE FROM {self.table} WHERE item_id = ?",
+                    (item_id,)
+                )
+                if cursor.rowcount:
+                    found.add(item_id)
+        return found
+
+
+class InstrumentedBackend:
+    """Wrap a storage backend so every call is recorded as a span.
+
+    Spans are named "backend.<method>" and record the rows or cells
+    sent ("items_in") and returned ("items_out"). Nothing is measured
+    while profiling is disabled.
+
+    Args:
+        backend (StorageBackend): The backend doing the work.
+        shard (str): The shard it stores.
+    """
+
+    def __init__(self, backend, shard):
+        self.backend = backend
+        self.shard = shard
+
+    def __getattr__(self, name):
+        attribute = getattr(self.backend, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def call(*args, **kwargs):
+            if not instrumentation.RECORDER.enabled:
+                return attribute(*args, **kwargs)
+            with instrumentation.span(f"backend.{name}") as attributes:
+                if args and isinstance(args[0], (list, tuple)):
+                    attributes["items_in"] = len(args[0])
+                result = attribute(*args, **kwargs)
+                if isinstance(result, list):
+                    attributes["items_out"] = len(result)
+                return result
+        return call
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(shard=None):
+    """Return the storage backend of a shard, creating it on first use.
+
+    The backend type is selected with the INVENTORY_BACKEND environment
+    variable ("sheets" or "sqlite").
+
+    Args:
+        shard (str, optional): One of config.SHARDS, the first by default.
+
+    Returns:
+        StorageBackend: The shared backend instance for the shard.
+    """
+    shard = shard or config.SHARDS[0]
+    with _backends_lock:
+        if shard not in _backends:
+            _backends[shard] = InstrumentedBackend(
+                create_backend(shard),
+                shard
+            )
+    return _backends[shard]
+
+
+def create_backend(shard):
+    """Create a new storage backend for a shard.
+
+    Args:
+        shard (str): The worksheet name, or "spreadsheet/worksheet".
+
+    Returns:
+        StorageBackend: The new backend.
+    """
+    if config.BACKEND == "sqlite":
+        # The default worksheet keeps the original table name
+        if shard == config.WORKSHEET_NAME:
+            return SQLiteBackend(config.DB_PATH)
+        return SQLiteBackend(config.DB_PATH, f"inventory_{shard}")
+    if config.BACKEND == "sheets":
+        spreadsheet_name, _, worksheet_name = shard.rpartition("/")
+        return SheetsBackend(
+            config.CREDS_FILE,
+            spreadsheet_name or config.SPREADSHEET_NAME,
+            worksheet_name
+        )
+    raise StorageError(f"Unknown storage backend '{config.BACKEND}'.")
@@ -1,17 +1,30 @@
 import sys
 import os
 from rich.console import Console
-from art import text2art
+from modules import instrumentation
+from modules.banner import BANNER
 from modules.menu import main_menu, operations_menu
-from modules.inventory_management import display_items, display_help
-from modules.google_sheets import get_data
+from modules.inventory_management import (
+    choose_location,
+    display_items,
+    display_help
+)
+from modules.google_sheets import get_data, flush_writes, resume_snapshot
 
 
 def start_view():
     """Display the welcome message with ASCII art."""
     console = Console()
-    ascii_art = text2art("Inventory")
-    console.print(f"[green bold]{ascii_art}[/green bold]")
+    console.print(f"[green bold]{BANNER}[/green bold]")
+
+
+def announce_refresh():
+    """Tell the user that the saved inventory was out of date."""
+    console = Console()
+    console.print(
+        "\n[yellow]The inventory changed since the last session "
+        "and was refreshed."
+    )
 
 
 def main():
@@ -19,26 +32,83 @@ def main():
     os.system("clear")
 
     start_view()
+    # Show the last session's inventory while the sheet is checked
+    resume_snapshot(announce_refresh)
 
     while True:
         choice = main_menu()
         if choice == "1":
-            data = get_data()
-            display_items(data, "Inventory Items")
+            location = choose_location()
+            if location is None:
+                continue
+            data = get_data(location or None)
+            title = "Inventory Items"
+            if location:
+                title += f" ({location})"
+            display_items(
+                data,
+                title,
+                reload=lambda: get_data(location or None)
+            )
         elif choice == "2":
             operations_menu()
         elif choice == '9':
             display_help()
         elif choice == "0":
             print("Quitting the application...")
+            flush_writes()
             sys.exit()
 
 
+def parse_profile_option(args):
+    """Handle the --profile[=report.json] option, valid in every mode.
+
+    Args:
+        args (list): The command line arguments, without the program name.
+
+    Returns:
+        tuple: The other arguments and the JSON report path, if any.
+    """
+    remaining = []
+    report_path = None
+    for arg in args:
+        option, _, value = arg.partition("=")
+        if option == "--profile":
+            instrumentation.enable()
+            report_path = value or None
+        else:
+            remaining.append(arg)
+    return remaining, report_path
+
+
+def report_profile(report_path):
+    """Print the profile of the session and save it as JSON if asked."""
+    if not instrumentation.RECORDER.enabled:
+        return
+    instrumentation.print_report()
+    if report_path:
+        instrumentation.export_report(report_path)
+        print(f"Profile saved to {report_path}", file=sys.stderr)
+
+
 # Run the main function only if this script is executed directly
 if __name__ == "__main__":
+    args, report_path = parse_profile_option(sys.argv[1:])
     try:
-        main()
-    except KeyboardInterrupt:
-        # Handle the keyboard interrupt exception when the user presses Ctrl+C
-        print("\nApplication terminated by user. Quitting the application...")
-        sys.exit(0)
+        # Any arguments select the non-interactive scripting interface
+        if args:
+            # Imported here so the interactive start does not load argparse
+            from modules.cli import run as run_command
+            sys.exit(run_command(args))
+
+        try:
+            main()
+        except KeyboardInterrupt:
+            # Handle the keyboard interrupt exception (Ctrl+C)
+            print(
+                "\nApplication terminated by user. Quitting the application..."
+            )
+            flush_writes()
+            sys.exit(0)
+    finally:
+        report_profile(report_path)